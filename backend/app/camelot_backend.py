@@ -0,0 +1,18 @@
+import fitz  # PyMuPDF
+
+class PyMuPDFBackend:
+    """Camelot image-conversion backend that rasterizes pages in-process
+
+    Camelot's default backend starts a Ghostscript process for every page it
+    inspects; rendering with the already loaded PyMuPDF avoids that spawn.
+    """
+
+    def convert(self, pdf_path: str, png_path: str, resolution: int = 300, page: int = 1):
+        """Render 1-based `page` of `pdf_path` to `png_path` (the interface Camelot calls)
+
+        Older Camelot versions split out a single-page PDF and omit `page`;
+        newer ones pass the page number of the original document.
+        """
+        with fitz.open(pdf_path) as doc:
+            pix = doc.load_page(page - 1).get_pixmap(dpi=resolution)
+            pix.save(png_path)
@@ -0,0 +1,166 @@
+import multiprocessing
+from multiprocessing import spawn
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# How often a running stage checks its deadline and the cancel callback
+POLL_INTERVAL = 0.2
+
+class StageTimeout(Exception):
+    """A stage ran past its time budget"""
+
+class StageCancelled(Exception):
+    """A stage was cancelled, e.g. because the client disconnected"""
+
+class StageError(Exception):
+    """A stage failed inside its worker process"""
+
+class ConversionBudget:
+    """Overall deadline plus a per-stage cap for one conversion"""
+
+    def __init__(self, timeout: Optional[float] = None, stage_timeout: Optional[float] = None,
+                 cancel_check: Optional[Callable[[], bool]] = None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.stage_timeout = stage_timeout
+        self.cancel_check = cancel_check
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.deadline or self.stage_timeout or self.cancel_check)
+
+    def cancelled(self) -> bool:
+        return bool(self.cancel_check and self.cancel_check())
+
+    def stage_budget(self) -> Optional[float]:
+        """Seconds the next stage may run, or None for no limit"""
+        budgets = []
+        if self.deadline:
+            budgets.append(max(0.0, self.deadline - time.monotonic()))
+        if self.stage_timeout:
+            budgets.append(self.stage_timeout)
+        return min(budgets) if budgets else None
+
+# Modules imported once by the fork server, so stage processes start without importing them
+_preload_modules = [__name__]
+_context = None
+_context_lock = threading.Lock()
+
+# Path of the parent's main script, handed to the fork server through its environment
+MAIN_PATH_ENV = 'STAGE_FORKSERVER_MAIN'
+
+def preload_for_stages(module_name: str):
+    """Have the fork server import a module that stage functions live in
+    
+    Must be called before the first stage runs, e.g. at import time of that module.
+    """
+    if module_name not in _preload_modules:
+        _preload_modules.append(module_name)
+
+def _mp_context():
+    """Start stage processes from a single-threaded fork server
+    
+    Stages are started from threadpool threads of a multi-threaded server, and a
+    plain fork there can copy a lock another thread holds (stdout, a cache lock,
+    a C library's) into a child that then waits on it forever. The fork server is
+    a clean process that has already imported the preloaded modules, so its
+    children still start without re-importing the PDF libraries. Elsewhere spawn is used.
+    """
+    global _context
+    with _context_lock:
+        if _context is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                _context = multiprocessing.get_context('forkserver')
+                _context.set_forkserver_preload(list(_preload_modules))
+                main_path = spawn.get_preparation_data('stage').get('init_main_from_path')
+                if main_path:
+                    os.environ[MAIN_PATH_ENV] = main_path
+            else:
+                _context = multiprocessing.get_context('spawn')
+        return _context
+
+def _import_main_in_fork_server():
+    """Import the parent's main script once in the fork server
+    
+    Stage processes re-run the main script unless the process they are forked
+    from already has it as __main__. The fork server is meant to import it for a
+    '__main__' preload entry, but Python 3.11 drops the path on the way, which
+    costs every stage the main script's imports (a few hundred ms with FastAPI).
+    """
+    main_path = os.environ.pop(MAIN_PATH_ENV, None)
+    if main_path and getattr(sys.modules['__main__'], '__file__', None) != main_path:
+        try:
+            spawn.import_main_path(main_path)
+        except BaseException as e:
+            # Stage processes then run the main script themselves, as before
+            print(f"Warning: fork server could not import {main_path}: {e!r}")
+
+def _stage_entry(conn, func: Callable, args: tuple):
+    if hasattr(os, 'setsid'):
+        # Own process group, so Ghostscript/Tesseract children are killed with us
+        os.setsid()
+    try:
+        conn.send(('ok', func(*args)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+def _kill_stage(process):
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+def run_stage(func: Callable, args: tuple, budget: ConversionBudget) -> Any:
+    """Run func(*args) in a worker process, killing it when over budget or cancelled
+
+    func and args are pickled into the worker, so func must be importable by
+    reference (a module-level function or a method of a picklable object).
+    Raises StageTimeout, StageCancelled or StageError; otherwise returns func's result.
+    """
+    if budget.cancelled():
+        raise StageCancelled("Conversion cancelled")
+    stage_budget = budget.stage_budget()
+    if stage_budget is not None and stage_budget <= 0:
+        raise StageTimeout("No time left for stage")
+
+    ctx = _mp_context()
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_stage_entry, args=(child_conn, func, args))
+    process.start()
+    child_conn.close()
+    stage_deadline = time.monotonic() + stage_budget if stage_budget is not None else None
+
+    try:
+        while True:
+            if parent_conn.poll(POLL_INTERVAL):
+                try:
+                    status, payload = parent_conn.recv()
+                except EOFError:
+                    process.join()
+                    raise StageError(f"Stage worker exited with code {process.exitcode}")
+                if status == 'error':
+                    raise StageError(payload)
+                return payload
+            if not process.is_alive():
+                raise StageError(f"Stage worker exited with code {process.exitcode}")
+            if budget.cancelled():
+                raise StageCancelled("Conversion cancelled")
+            if stage_deadline is not None and time.monotonic() >= stage_deadline:
+                raise StageTimeout(f"Stage exceeded its {stage_budget:.1f}s budget")
+    finally:
+        if process.is_alive():
+            _kill_stage(process)
+        process.join()
+        parent_conn.close()
+
+# Runs when the fork server preloads this module, which is first in its list;
+# every name the main script might import from here is defined by now
+_import_main_in_fork_server()
@@ -0,0 +1,111 @@
+import fitz  # PyMuPDF
+import pdfplumber
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import List, Optional, Union
+
+class DocumentSource:
+    """A PDF held in memory or on disk, opened by each backend without extra copies
+
+    PyMuPDF and pdfplumber read in-memory documents directly. A file on disk
+    is only written for backends that need a path (Camelot/Ghostscript), and
+    only for as long as they need it.
+    """
+
+    def __init__(self, data: Optional[Union[bytes, mmap.mmap]] = None, path: Optional[str] = None):
+        if data is None and path is None:
+            raise ValueError("DocumentSource needs data or a path")
+        self.data = data
+        self.path = path
+        self._file = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'DocumentSource':
+        return cls(data=data)
+
+    @classmethod
+    def from_path(cls, path: str, use_mmap: bool = False) -> 'DocumentSource':
+        """Wrap a file on disk, optionally memory-mapping it for pdfplumber"""
+        source = cls(path=path)
+        if use_mmap:
+            source._file = open(path, 'rb')
+            source.data = mmap.mmap(source._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return source
+
+    @classmethod
+    def coerce(cls, source: Union['DocumentSource', bytes, str]) -> 'DocumentSource':
+        """Accept a DocumentSource, raw PDF bytes or a file path"""
+        if isinstance(source, DocumentSource):
+            return source
+        if isinstance(source, (bytes, bytearray)):
+            return cls.from_bytes(bytes(source))
+        return cls.from_path(os.fspath(source))
+
+    def __getstate__(self):
+        # A memory map cannot be sent to another process; the copy reads the file by path
+        if isinstance(self.data, mmap.mmap):
+            return {'data': None, 'path': self.path, '_file': None}
+        return {'data': self.data, 'path': self.path, '_file': None}
+
+    def open_fitz(self) -> fitz.Document:
+        """Open with PyMuPDF from memory when possible"""
+        if isinstance(self.data, bytes):
+            return fitz.open(stream=self.data, filetype='pdf')
+        # PyMuPDF cannot read from an mmap; it reads files on disk directly
+        return fitz.open(self.path)
+
+    def open_pdfplumber(self, pages: Optional[List[int]] = None) -> pdfplumber.PDF:
+        """Open with pdfplumber from memory (or the memory map) when possible"""
+        if isinstance(self.data, bytes):
+            return pdfplumber.open(io.BytesIO(self.data), pages=pages)
+        if self.data is not None:
+            self.data.seek(0)
+            return pdfplumber.open(self.data, pages=pages)
+        return pdfplumber.open(self.path, pages=pages)
+
+    @contextmanager
+    def as_path(self):
+        """Yield a file path, writing a temporary copy only for in-memory sources"""
+        if self.path:
+            yield self.path
+            return
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+            temp_file.write(self.data)
+            temp_path = temp_file.name
+        try:
+            yield temp_path
+        finally:
+            os.unlink(temp_path)
+
+    @contextmanager
+    def ensure_path(self):
+        """Yield a path-backed source, writing a temporary copy for in-memory sources
+
+        Use this in the parent process around stages that call `as_path()`, so the
+        copy is removed even if the stage process is killed.
+        """
+        if self.path:
+            yield self
+            return
+
+        with self.as_path() as temp_path:
+            yield DocumentSource(data=self.data, path=temp_path)
+
+    def close(self):
+        """Release the memory map, if any"""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+            self.data = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'DocumentSource':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
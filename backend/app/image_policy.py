@@ -0,0 +1,68 @@
+from PIL import Image
+import io
+from typing import Optional, Tuple
+
+class ImagePolicy:
+    """How extracted images are embedded in the output
+
+    The default keeps the original behaviour: every image at native
+    resolution as PNG. OCR always runs on the full-resolution image;
+    the policy only affects what is embedded.
+    """
+
+    FORMATS = ['PNG', 'JPEG', 'WEBP']
+    # Formats that ignore `quality`
+    LOSSLESS_FORMATS = ['PNG']
+    DATA_MODES = ['embed', 'metadata']
+
+    def __init__(self, max_dimension: Optional[int] = None, image_format: str = 'PNG',
+                 quality: int = 85, min_size: int = 0, data_mode: str = 'embed'):
+        image_format = image_format.upper()
+        if image_format == 'JPG':
+            image_format = 'JPEG'
+        if image_format not in self.FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        if data_mode not in self.DATA_MODES:
+            raise ValueError(f"Unsupported image data mode: {data_mode}")
+        if max_dimension is not None and max_dimension < 1:
+            raise ValueError("max_dimension must be positive")
+        if not 1 <= quality <= 100:
+            raise ValueError("quality must be between 1 and 100")
+
+        self.max_dimension = max_dimension
+        self.image_format = image_format
+        self.quality = quality
+        self.min_size = min_size
+        self.data_mode = data_mode
+
+    def cache_key(self) -> str:
+        """Stable string identifying the policy, for cache keys and output paths"""
+        if self.data_mode == 'metadata':
+            return f"metadata-min{self.min_size}"
+        # Quality does not change lossless output, so it must not split the cache
+        quality = '' if self.image_format in self.LOSSLESS_FORMATS else f"-q{self.quality}"
+        return f"{self.image_format.lower()}{quality}-max{self.max_dimension or 0}-min{self.min_size}"
+
+    def skip(self, width: int, height: int) -> bool:
+        """Whether an image is too small to be worth extracting"""
+        return min(width, height) < self.min_size
+
+    def is_passthrough(self) -> bool:
+        """Whether the native-resolution PNG can be embedded unchanged"""
+        return self.image_format == 'PNG' and self.max_dimension is None
+
+    def encode(self, image: Image.Image) -> Tuple[bytes, int, int]:
+        """Downscale and re-encode an image, returning (data, width, height)"""
+        if self.max_dimension and max(image.size) > self.max_dimension:
+            image = image.copy()
+            image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+
+        if self.image_format == 'JPEG' and image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+
+        buffered = io.BytesIO()
+        if self.image_format in self.LOSSLESS_FORMATS:
+            image.save(buffered, format='PNG')
+        else:
+            image.save(buffered, format=self.image_format, quality=self.quality)
+        return buffered.getvalue(), image.width, image.height
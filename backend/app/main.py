@@ -1,10 +1,19 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from typing import Callable, Optional
+import asyncio
+import hashlib
 import os
-import tempfile
-from .pdf_processor import PDFProcessor
-from .xml_generator import XMLGenerator
+import threading
+from .pdf_processor import PDFProcessor, approximate_size
+from .image_policy import ImagePolicy
+from .document_source import DocumentSource
+from .output_formats import OutputSerializer, write_atomic
+from .preview import OutputPreview
+from .result_index import ResultIndex
 
 app = FastAPI(title="PDF to XML Converter", version="1.0.0")
 
@@ -19,72 +28,237 @@ app.add_middleware(
 
 # Initialize processors
 pdf_processor = PDFProcessor()
-xml_generator = XMLGenerator()
+output_serializer = OutputSerializer()
+output_preview = OutputPreview(output_serializer)
+
+# Output files and the index mapping them are shared by all worker processes
+OUTPUT_DIR = os.path.abspath(os.getenv("OUTPUT_DIR", "temp"))
+result_index = ResultIndex(os.getenv("RESULT_INDEX_PATH", os.path.join(OUTPUT_DIR, "results.db")))
+
+# Time budgets in seconds for a whole conversion and for each extraction stage (0 = unlimited)
+CONVERSION_TIMEOUT = float(os.getenv("CONVERSION_TIMEOUT", "300"))
+STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT", "120"))
+
+# Extracted data keyed by the SHA-256 of the uploaded PDF, so the same
+# document can be re-emitted in another format without re-extracting it
+EXTRACTION_CACHE_SIZE = 32
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Values are (extracted data, approximate size in bytes)
+extraction_cache = OrderedDict()
+extraction_cache_bytes = 0
+extraction_cache_lock = threading.Lock()
+
+def resolve_output_path(filename: str) -> str:
+    """Find an output file through the shared index, whichever worker wrote it"""
+    result = result_index.get_result(filename)
+    if result:
+        return result['path']
+    return os.path.join(OUTPUT_DIR, os.path.basename(filename))
+
+def conversion_timeout(requested: Optional[float] = None) -> Optional[float]:
+    """Budget for one conversion; a client may shorten the server limit but not raise it"""
+    if not CONVERSION_TIMEOUT:
+        return requested
+    return min(requested, CONVERSION_TIMEOUT) if requested else CONVERSION_TIMEOUT
+
+def write_output(output_path: str, output_content: bytes):
+    """Save an output file; two workers converting the same upload write the same path"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    write_atomic(output_path, output_content)
+
+async def watch_disconnect(request: Request, disconnected: threading.Event):
+    """Set `disconnected` once the client goes away"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(0.5)
+    disconnected.set()
+
+def extract_with_cache(content: bytes, text_engine: str = PDFProcessor.DEFAULT_TEXT_ENGINE,
+                       content_hash: Optional[str] = None, timeout: Optional[float] = None,
+                       cancel_check: Optional[Callable[[], bool]] = None,
+                       image_policy: Optional[ImagePolicy] = None) -> tuple:
+    """Run the PDF processor on uploaded bytes, reusing cached results
+    
+    Returns the extracted data and the number of pages reused from earlier conversions.
+    Partial results (deadline hit or cancelled) are returned but not cached.
+    """
+    global extraction_cache_bytes
+    image_policy = image_policy or ImagePolicy()
+    cache_key = (content_hash or hashlib.sha256(content).hexdigest(), text_engine, image_policy.cache_key())
+    with extraction_cache_lock:
+        cached = extraction_cache.get(cache_key)
+        if cached is not None:
+            extraction_cache.move_to_end(cache_key)
+            extracted_data = cached[0]
+            return extracted_data, extracted_data.get('page_count', 0)
+    
+    # Process straight from memory; a temporary file is only written if a path-only backend needs it
+    extracted_data = pdf_processor.process_pdf(
+        DocumentSource.from_bytes(content),
+        text_engine=text_engine,
+        timeout=conversion_timeout(timeout),
+        stage_timeout=STAGE_TIMEOUT or None,
+        cancel_check=cancel_check,
+        image_policy=image_policy
+    )
+    
+    size = approximate_size(extracted_data)
+    if extracted_data.get('status') == 'complete' and size <= EXTRACTION_CACHE_MAX_BYTES:
+        with extraction_cache_lock:
+            if cache_key not in extraction_cache:
+                extraction_cache[cache_key] = (extracted_data, size)
+                extraction_cache_bytes += size
+            while len(extraction_cache) > EXTRACTION_CACHE_SIZE or extraction_cache_bytes > EXTRACTION_CACHE_MAX_BYTES:
+                _, (_, evicted_size) = extraction_cache.popitem(last=False)
+                extraction_cache_bytes -= evicted_size
+    return extracted_data, extracted_data.get('pages_reused', 0)
 
 @app.post("/convert-pdf-to-xml")
-async def convert_pdf_to_xml(file: UploadFile = File(...)):
-    """Main endpoint for PDF to XML conversion"""
+async def convert_pdf_to_xml(
+    request: Request,
+    file: UploadFile = File(...),
+    format: str = Query("xml"),
+    text_engine: str = Query(PDFProcessor.DEFAULT_TEXT_ENGINE),
+    timeout: Optional[float] = Query(None, gt=0),
+    image_max_dimension: Optional[int] = Query(None, ge=1),
+    image_format: str = Query("png"),
+    image_quality: int = Query(85, ge=1, le=100),
+    image_min_size: int = Query(0, ge=0),
+    image_data: str = Query("embed")
+):
+    """Main endpoint for PDF conversion (XML by default, or JSON/NDJSON/MessagePack)
+    
+    `timeout` shortens the conversion budget in seconds (it cannot exceed the
+    server's CONVERSION_TIMEOUT). Sections that run out of time are omitted and the result is marked as partial.
+    
+    Image options: `image_max_dimension` downscales embedded images, `image_format`
+    is png/jpeg/webp with `image_quality` for lossy formats, images smaller than
+    `image_min_size` pixels on either side are skipped, and `image_data=metadata`
+    omits pixel data entirely.
+    """
     
     # Validate file type
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-        content = await file.read()
-        temp_file.write(content)
-        temp_file_path = temp_file.name
+    # Validate output format
+    output_format = format.lower()
+    if output_format not in output_serializer.supported_formats():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Choose one of: {', '.join(output_serializer.supported_formats())}"
+        )
     
+    # Validate text engine
+    if text_engine not in PDFProcessor.TEXT_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported text engine '{text_engine}'. Choose one of: {', '.join(PDFProcessor.TEXT_ENGINES)}"
+        )
+    
+    # Validate image policy
     try:
-        # Process PDF
-        extracted_data = pdf_processor.process_pdf(temp_file_path)
-        
-        # Generate XML
-        xml_content = xml_generator.generate_xml(extracted_data)
-        
-        # Save XML file
-        xml_filename = f"{file.filename.replace('.pdf', '')}.xml"
-        xml_path = f"temp/{xml_filename}"
+        image_policy = ImagePolicy(
+            max_dimension=image_max_dimension,
+            image_format=image_format,
+            quality=image_quality,
+            min_size=image_min_size,
+            data_mode=image_data
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    content = await file.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+    # Public name is unique per PDF, engine, image policy and format, so different
+    # uploads that share a file name never replace each other's results
+    output_stem = os.path.basename(file.filename)[:-len('.pdf')]
+    output_filename = (
+        f"{output_stem}-{content_hash[:12]}-{text_engine}-{image_policy.cache_key()}"
+        f".{output_serializer.extension(output_format)}"
+    )
+    # Index calls may wait on SQLite write locks, so they run off the event loop
+    job_id = await run_in_threadpool(result_index.start_job, file.filename, content_hash)
+    
+    try:
+        # Reuse an output another worker already produced for the same PDF
+        existing = await run_in_threadpool(
+            result_index.find_result, content_hash, text_engine, output_format, image_policy.cache_key()
+        )
+        if existing and os.path.exists(existing['path']):
+            output_path = existing['path']
+            page_count = pages_reused = existing['page_count']
+            incomplete_sections = []
+        else:
+            # Process PDF off the event loop, cancelling if the client disconnects
+            disconnected = threading.Event()
+            watcher = asyncio.create_task(watch_disconnect(request, disconnected))
+            try:
+                extracted_data, pages_reused = await run_in_threadpool(
+                    extract_with_cache, content, text_engine, content_hash, timeout, disconnected.is_set, image_policy
+                )
+            finally:
+                watcher.cancel()
+            page_count = extracted_data.get('page_count', 0)
+            incomplete_sections = extracted_data.get('incomplete_sections', [])
+            
+            # Serialize to the requested format and save the output file
+            output_content = await run_in_threadpool(output_serializer.serialize, extracted_data, output_format)
+            output_path = os.path.join(OUTPUT_DIR, output_filename)
+            await run_in_threadpool(write_output, output_path, output_content)
         
-        os.makedirs("temp", exist_ok=True)
-        with open(xml_path, 'w', encoding='utf-8') as xml_file:
-            xml_file.write(xml_content)
+        partial = bool(incomplete_sections)
+        await run_in_threadpool(
+            result_index.add_result, output_filename, output_path, output_format, content_hash, text_engine,
+            page_count, complete=not partial, image_policy=image_policy.cache_key()
+        )
+        await run_in_threadpool(result_index.finish_job, job_id, partial=partial)
         
         return JSONResponse({
             "status": "success",
-            "message": "PDF converted successfully",
-            "xml_file": xml_filename,
-            "download_url": f"/download/{xml_filename}"
+            "message": "PDF converted with partial results" if partial else "PDF converted successfully",
+            "format": output_format,
+            "partial": partial,
+            "incomplete_sections": incomplete_sections,
+            "page_count": page_count,
+            "pages_reused": pages_reused,
+            "xml_file": output_filename,
+            "download_url": f"/download/{output_filename}"
         })
         
     except Exception as e:
+        await run_in_threadpool(result_index.finish_job, job_id, str(e))
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
-    
-    finally:
-        # Clean up temporary PDF file
-        os.unlink(temp_file_path)
 
 @app.get("/download/{filename}")
 async def download_file(filename: str):
-    """Endpoint to download generated XML file"""
-    file_path = f"temp/{filename}"
+    """Endpoint to download generated output file"""
+    file_path = await run_in_threadpool(resolve_output_path, filename)
     if os.path.exists(file_path):
         return FileResponse(
             path=file_path,
             filename=filename,
-            media_type='application/xml'
+            media_type=output_serializer.media_type(output_serializer.format_for_filename(filename))
         )
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
 @app.get("/preview/{filename}")
-async def preview_xml(filename: str):
-    """Endpoint to preview XML content"""
-    file_path = f"temp/{filename}"
+async def preview_xml(filename: str, page: Optional[int] = Query(None, ge=1), page_size: int = Query(200, ge=1)):
+    """Endpoint to preview generated output content
+    
+    Without `page` the whole file is returned; otherwise only `page_size` lines of it,
+    read without loading the rest of the file and with very long lines truncated.
+    """
+    file_path = await run_in_threadpool(resolve_output_path, filename)
     if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        return JSONResponse({"xml_content": content})
+        output_format = output_serializer.format_for_filename(filename)
+        if page is None:
+            content = await run_in_threadpool(output_preview.read_all, file_path, output_format)
+            return JSONResponse({"xml_content": content, "format": output_format})
+        
+        preview = await run_in_threadpool(output_preview.page, file_path, output_format, page, page_size)
+        preview["format"] = output_format
+        return JSONResponse(preview)
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
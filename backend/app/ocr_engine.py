@@ -0,0 +1,177 @@
+from PIL import Image
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Optional
+try:
+    from tesserocr import PyTessBaseAPI
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+OCR_FAILED = "OCR extraction failed"
+
+class OCREngine:
+    """OCR without paying Tesseract's start-up and model-load cost per image
+
+    With tesserocr installed, a small pool of long-lived Tesseract API
+    instances is kept per process. Otherwise images are OCRed in batches
+    by a single `tesseract` run over a file list.
+    
+    The engine is used from the long-lived server process (not from the
+    short-lived stage workers), so the pool survives across conversions.
+    A timeout bounds each batch; TimeoutError is raised when it runs out.
+    """
+
+    def __init__(self, tesseract_available: bool, pool_size: int = 2, lang: str = 'eng'):
+        self.tesseract_available = tesseract_available
+        self.pool_size = pool_size
+        self.lang = lang
+        self._pool = None
+        self._pool_pid = None
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Tesseract instances belong to one process; a copy starts without a pool
+        state = self.__dict__.copy()
+        state.update(_pool=None, _pool_pid=None, _created=0)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return TESSEROCR_AVAILABLE or self.tesseract_available
+
+    def image_to_string_batch(self, images: List[Image.Image], timeout: Optional[float] = None) -> List[str]:
+        """OCR several images, returning one text per image"""
+        if not images:
+            return []
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if TESSEROCR_AVAILABLE:
+            return [self._ocr_with_api(image, deadline) for image in images]
+        return self._ocr_with_file_list(images, deadline)
+    
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        """Seconds left before the deadline; raises TimeoutError once it has passed"""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("OCR ran out of time")
+        return remaining
+
+    def _ensure_pool(self):
+        # APIs are not shared with forked children; each process builds its own
+        with self._lock:
+            if self._pool_pid != os.getpid():
+                self._pool = queue.Queue()
+                self._pool_pid = os.getpid()
+                self._created = 0
+
+    def _acquire_api(self, deadline: Optional[float] = None):
+        """Take an API from the pool, creating one if the pool is not full yet
+        
+        When every API is busy, waits until one is returned or the deadline passes.
+        """
+        self._ensure_pool()
+        with self._lock:
+            try:
+                return self._pool.get_nowait()
+            except queue.Empty:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+        if not create:
+            try:
+                return self._pool.get(timeout=self._remaining(deadline))
+            except queue.Empty:
+                raise TimeoutError("OCR ran out of time waiting for a Tesseract instance")
+        try:
+            return PyTessBaseAPI(lang=self.lang)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _ocr_with_api(self, image: Image.Image, deadline: Optional[float] = None) -> str:
+        self._remaining(deadline)
+        try:
+            api = self._acquire_api(deadline)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"OCR failed: {e}")
+            return OCR_FAILED
+        try:
+            remaining = self._remaining(deadline)
+            api.SetImage(image)
+            # Recognize aborts once its timeout (in milliseconds) passes
+            if not api.Recognize(timeout=int(remaining * 1000) if remaining is not None else 0):
+                self._remaining(deadline)
+                return OCR_FAILED
+            return api.GetUTF8Text()
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f"OCR failed: {e}")
+            return OCR_FAILED
+        finally:
+            api.Clear()
+            self._pool.put(api)
+
+    def _ocr_with_file_list(self, images: List[Image.Image], deadline: Optional[float] = None) -> List[str]:
+        """Run one tesseract process over all images; pages come back separated by form feeds"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_paths = []
+            for index, image in enumerate(images):
+                image_path = os.path.join(temp_dir, f"{index}.png")
+                image.save(image_path, format="PNG")
+                image_paths.append(image_path)
+            list_path = os.path.join(temp_dir, "images.txt")
+            with open(list_path, 'w') as list_file:
+                list_file.write("\n".join(image_paths) + "\n")
+
+            # Outside the try: TimeoutError is an OSError and must not count as a failed run
+            timeout = self._remaining(deadline)
+            try:
+                result = subprocess.run(
+                    ['tesseract', list_path, 'stdout', '-l', self.lang],
+                    capture_output=True, check=True, timeout=timeout
+                )
+                texts = result.stdout.decode('utf-8', errors='replace').split('\f')
+            except subprocess.TimeoutExpired:
+                raise TimeoutError("OCR ran out of time")
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"Batched OCR failed: {e}")
+                texts = []
+
+            # Tesseract ends every page with a form feed, leaving one trailing chunk
+            if len(texts) == len(images) + 1 and not texts[-1].strip():
+                texts = texts[:-1]
+            if len(texts) == len(images):
+                return texts
+
+            # Page boundaries are unclear; fall back to one run per image
+            return [self._ocr_single_file(image_path, deadline) for image_path in image_paths]
+
+    def _ocr_single_file(self, image_path: str, deadline: Optional[float] = None) -> str:
+        timeout = self._remaining(deadline)
+        try:
+            result = subprocess.run(
+                ['tesseract', image_path, 'stdout', '-l', self.lang],
+                capture_output=True, check=True, timeout=timeout
+            )
+            return result.stdout.decode('utf-8', errors='replace')
+        except subprocess.TimeoutExpired:
+            raise TimeoutError("OCR ran out of time")
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"OCR failed for {os.path.basename(image_path)}: {e}")
+            return OCR_FAILED
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+from typing import Dict, List, Any
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+from .xml_generator import XMLGenerator
+
+def write_atomic(path: str, content: bytes):
+    """Write a file atomically, so concurrent readers never see a partial file
+    
+    The content goes to a temporary file in the same directory, which is then
+    renamed into place; concurrent writers of the same path each rename their own.
+    """
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.', suffix='.tmp',
+                                     delete=False) as temp_file:
+        temp_path = temp_file.name
+        try:
+            temp_file.write(content)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_path)
+            raise
+    os.replace(temp_path, path)
+
+class OutputSerializer:
+    """Serialize extracted PDF data to one of the supported output formats"""
+
+    # format name -> (file extension, media type)
+    FORMATS = {
+        'xml': ('xml', 'application/xml'),
+        'json': ('json', 'application/json'),
+        'ndjson': ('ndjson', 'application/x-ndjson'),
+        'msgpack': ('msgpack', 'application/msgpack'),
+    }
+
+    def __init__(self):
+        self.xml_generator = XMLGenerator()
+
+    def supported_formats(self) -> List[str]:
+        """Return the formats that can be produced in this environment"""
+        return [fmt for fmt in self.FORMATS if fmt != 'msgpack' or MSGPACK_AVAILABLE]
+
+    def extension(self, fmt: str) -> str:
+        return self.FORMATS[fmt][0]
+
+    def media_type(self, fmt: str) -> str:
+        return self.FORMATS[fmt][1]
+
+    def format_for_filename(self, filename: str) -> str:
+        """Guess the output format from a generated file name"""
+        extension = filename.rsplit('.', 1)[-1].lower()
+        for fmt, (fmt_extension, _) in self.FORMATS.items():
+            if fmt_extension == extension:
+                return fmt
+        return 'xml'
+
+    def serialize(self, extracted_data: Dict[str, Any], fmt: str = 'xml') -> bytes:
+        """Serialize extracted data to the requested format"""
+        if fmt not in self.supported_formats():
+            raise ValueError(f"Unsupported output format: {fmt}")
+
+        if fmt == 'xml':
+            return self.xml_generator.generate_xml(extracted_data).encode('utf-8')
+        if fmt == 'json':
+            return json.dumps(extracted_data, ensure_ascii=False, default=str).encode('utf-8')
+        if fmt == 'ndjson':
+            return self._to_ndjson(extracted_data)
+        return msgpack.packb(extracted_data, use_bin_type=True, default=str)
+
+    def to_text(self, content: bytes, fmt: str) -> str:
+        """Decode serialized content into a human-readable string for previews"""
+        if fmt == 'msgpack':
+            if not MSGPACK_AVAILABLE:
+                raise ValueError("msgpack is not installed")
+            data = msgpack.unpackb(content, raw=False)
+            return json.dumps(data, ensure_ascii=False, indent=2, default=str)
+        return content.decode('utf-8')
+
+    def _to_ndjson(self, extracted_data: Dict[str, Any]) -> bytes:
+        """One header line with document-level data, then one line per page"""
+        pages: Dict[int, Dict[str, Any]] = {}
+
+        def page_record(page_num: int) -> Dict[str, Any]:
+            if page_num not in pages:
+                pages[page_num] = {
+                    'type': 'page',
+                    'page': page_num,
+                    'text': None,
+                    'tables': [],
+                    'images': []
+                }
+            return pages[page_num]
+
+        for page_num in range(1, extracted_data.get('page_count', 0) + 1):
+            page_record(page_num)
+        for page_data in extracted_data.get('text_content', []):
+            page_record(int(page_data.get('page', 0)))['text'] = page_data
+        for table_data in extracted_data.get('tables', []):
+            page_record(int(table_data.get('page', 0)))['tables'].append(table_data)
+        for image_data in extracted_data.get('images', []):
+            page_record(int(image_data.get('page', 0)))['images'].append(image_data)
+
+        header = {
+            key: value for key, value in extracted_data.items()
+            if key not in ('text_content', 'tables', 'images')
+        }
+        header['type'] = 'document'
+
+        lines = [json.dumps(header, ensure_ascii=False, default=str)]
+        for page_num in sorted(pages):
+            lines.append(json.dumps(pages[page_num], ensure_ascii=False, default=str))
+        return ('\n'.join(lines) + '\n').encode('utf-8')
@@ -1,5 +1,4 @@
 import fitz  # PyMuPDF
-import pdfplumber
 try:
     import camelot
     CAMELOT_AVAILABLE = True
@@ -9,17 +8,79 @@ except ImportError:
 
 import pandas as pd
 from PIL import Image
+from collections import OrderedDict
+from contextlib import nullcontext
 import io
 import base64
-from typing import Dict, List, Any
+import hashlib
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Any, Optional, Set, Union
 import subprocess
 import os
+from .deadlines import ConversionBudget, StageCancelled, StageError, StageTimeout, preload_for_stages, run_stage
+from .image_policy import ImagePolicy
+from .document_source import DocumentSource
+from .ocr_engine import OCREngine, OCR_FAILED
+from .camelot_backend import PyMuPDFBackend
+
+# Extraction stages run in processes started by a fork server that has imported this module
+preload_for_stages(__name__)
+
+# Indirect reference such as "12 0 R" inside a PDF object definition
+PDF_REFERENCE = re.compile(r"\b(\d+)\s+(\d+)\s+R\b")
+# Back-reference from a page or annotation to its parent; not part of the page's content
+PDF_PARENT_KEY = re.compile(r"/(?:Parent|P)\s+\d+\s+\d+\s+R\b")
+
+def approximate_size(value: Any) -> int:
+    """Rough in-memory size of extracted data in bytes, dominated by text and base64 image data"""
+    if isinstance(value, dict):
+        return sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(approximate_size(item) for item in value)
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
 
 class PDFProcessor:
+    # Available text extraction engines: PyMuPDF is fast native extraction,
+    # pdfplumber is slower but follows the page layout more closely
+    TEXT_ENGINES = ['pymupdf', 'pdfplumber']
+    DEFAULT_TEXT_ENGINE = 'pymupdf'
+
+    # Limits for per-page results kept for incremental re-conversion; embedded
+    # images make page results large, so the cache is bounded by bytes as well
+    PAGE_CACHE_SIZE = 2000
+    PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Images held at full resolution before they are OCRed together
+    OCR_BATCH_SIZE = 16
+
     def __init__(self):
         self.supported_formats = ['.pdf']
         # Check if tesseract is available
         self.tesseract_available = self._check_tesseract()
+        # Warm OCR workers and in-process page rasterization for Camelot
+        self.ocr_engine = OCREngine(self.tesseract_available, pool_size=int(os.getenv("OCR_POOL_SIZE", "2")))
+        self.camelot_backend = PyMuPDFBackend()
+        # Per-page extraction results keyed by (page fingerprint, text engine, image policy),
+        # stored as (result, approximate size in bytes)
+        self.page_cache = OrderedDict()
+        self.page_cache_bytes = 0
+        self.page_cache_lock = threading.Lock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Stage processes receive the configuration, not the page cache or its lock"""
+        state = self.__dict__.copy()
+        state['page_cache'] = OrderedDict()
+        state['page_cache_bytes'] = 0
+        del state['page_cache_lock']
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.page_cache_lock = threading.Lock()
     
     def _check_tesseract(self) -> bool:
         """Check if tesseract is available"""
@@ -31,42 +92,271 @@ class PDFProcessor:
             print("Warning: Tesseract OCR not found. Image text extraction will be skipped.")
             return False
     
-    def process_pdf(self, pdf_path: str) -> Dict[str, Any]:
-        """Main processing function that extracts all data from PDF"""
+    def process_pdf(self, source: Union[DocumentSource, bytes, str], text_engine: str = DEFAULT_TEXT_ENGINE,
+                    timeout: Optional[float] = None, stage_timeout: Optional[float] = None,
+                    cancel_check: Optional[Callable[[], bool]] = None,
+                    image_policy: Optional[ImagePolicy] = None) -> Dict[str, Any]:
+        """Main processing function that extracts all data from PDF
+        
+        `source` may be a DocumentSource, the PDF's bytes or a file path; in-memory
+        documents are processed without writing them to disk.
+        
+        With a `timeout` (whole conversion), `stage_timeout` (each of text, tables
+        and images) or `cancel_check`, stages run in killable worker processes.
+        Sections that did not finish are left empty and listed in
+        `incomplete_sections`, and `status` is set to 'partial'.
+        
+        `image_policy` controls image resolution, encoding and embedding.
+        """
+        
+        if text_engine not in self.TEXT_ENGINES:
+            raise ValueError(f"Unknown text engine: {text_engine}")
+        image_policy = image_policy or ImagePolicy()
+        source = DocumentSource.coerce(source)
         
         extracted_data = {
             'metadata': {},
             'text_content': [],
             'tables': [],
             'images': [],
-            'page_count': 0
+            'page_count': 0,
+            'pages_reused': 0,
+            'status': 'complete',
+            'incomplete_sections': []
         }
+        budget = ConversionBudget(timeout, stage_timeout, cancel_check)
         
         try:
             # Extract metadata and basic info
-            extracted_data['metadata'] = self._extract_metadata(pdf_path)
+            extracted_data['metadata'] = self._extract_metadata(source)
             
-            # Extract text content
-            extracted_data['text_content'] = self._extract_text(pdf_path)
+            # Fingerprint pages and find the ones not seen before
+            fingerprints = self._page_fingerprints(source)
+            cache_keys = [(fingerprint, text_engine, image_policy.cache_key()) for fingerprint in fingerprints]
+            extracted_data['page_count'] = len(fingerprints)
+            with self.page_cache_lock:
+                page_results = {key: self.page_cache[key][0] for key in cache_keys if key in self.page_cache}
+            pages = [page_num for page_num, key in enumerate(cache_keys, 1) if key not in page_results]
+            extracted_data['pages_reused'] = len(fingerprints) - len(pages)
             
-            # Extract tables
-            extracted_data['tables'] = self._extract_tables(pdf_path)
-            
-            # Extract images (with or without OCR)
-            extracted_data['images'] = self._extract_images(pdf_path)
+            if pages:
+                # Extract text content
+                text_content = self._run_stage(extracted_data, 'text_content', budget,
+                                               self._extract_text, source, text_engine, pages)
+                
+                # Extract tables; Camelot needs a file, which is written and removed here
+                # rather than in the stage process, which may be killed
+                with source.ensure_path() if CAMELOT_AVAILABLE else nullcontext(source) as table_source:
+                    tables = self._run_stage(extracted_data, 'tables', budget,
+                                             self._extract_tables, table_source, pages)
+                
+                # Extract images; OCR runs here with the long-lived OCR pool rather
+                # than in the short-lived stage worker
+                images = self._run_stage(extracted_data, 'images', budget,
+                                         self._extract_images, source, pages, image_policy, True)
+                self._ocr_deferred_images(source, extracted_data, images, budget)
+                
+                page_results.update(self._group_page_results(cache_keys, pages, text_content, tables, images))
             
-            # Get page count
-            with fitz.open(pdf_path) as doc:
-                extracted_data['page_count'] = len(doc)
+            # Assemble the document from per-page results; partial pages are not cached
+            if extracted_data['status'] == 'complete':
+                self._update_page_cache(page_results)
+            self._assemble_pages(extracted_data, cache_keys, page_results)
             
             return extracted_data
             
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
     
-    def _extract_metadata(self, pdf_path: str) -> Dict[str, Any]:
+    def _run_stage(self, extracted_data: Dict[str, Any], section: str, budget: ConversionBudget,
+                   func: Callable, *args) -> List[Dict[str, Any]]:
+        """Run one extraction stage within the budget, recording it as incomplete on timeout,
+        cancel, or a crash of its worker process (e.g. killed for running out of memory)"""
+        if not budget.enabled:
+            return func(*args)
+        
+        try:
+            return run_stage(func, args, budget)
+        except StageTimeout as e:
+            reason = 'timeout'
+            print(f"{section} extraction stopped: {e}")
+        except StageCancelled:
+            reason = 'cancelled'
+        except StageError as e:
+            reason = 'error'
+            print(f"{section} extraction failed: {e}")
+        
+        extracted_data['status'] = 'partial'
+        extracted_data['incomplete_sections'].append({'section': section, 'reason': reason})
+        return []
+    
+    def _page_fingerprints(self, source: DocumentSource) -> List[str]:
+        """Hash everything that determines a page's extraction results
+        
+        The page object is hashed together with every object it references:
+        content streams, fonts (including ToUnicode maps and font programs),
+        images, Form XObjects and their own resources, and graphics states.
+        Resources inherited from the page tree are included as well. References
+        to other pages (e.g. link destinations) are not followed.
+        """
+        fingerprints = []
+        
+        with source.open_fitz() as doc:
+            page_xrefs = {doc.page_xref(page_num) for page_num in range(len(doc))}
+            # Object hashes are shared between pages, e.g. for common fonts
+            object_hashes = {}
+            for page in doc:
+                digest = hashlib.sha256()
+                digest.update(self._object_hash(doc, page.xref, object_hashes, page_xrefs).encode())
+                digest.update(self._inherited_resources_hash(doc, page.xref, object_hashes, page_xrefs).encode())
+                digest.update(repr((tuple(page.rect), page.rotation)).encode())
+                fingerprints.append(digest.hexdigest())
+        
+        return fingerprints
+    
+    def _object_hash(self, doc: fitz.Document, root: int, object_hashes: Dict[int, str],
+                     page_xrefs: Set[int]) -> str:
+        """Content-address a PDF object: references are replaced by the hash of their target
+        
+        Object numbers are not stable between revisions of the same file, so only
+        object contents (and raw stream data) contribute to the hash. References to
+        pages hash as a fixed token. The object graph is walked depth-first with an
+        explicit stack, so deep chains of objects cannot exhaust the recursion limit.
+        """
+        if root in object_hashes:
+            return object_hashes[root]
+        
+        # Hashes of objects in a reference cycle depend on where the walk entered the
+        # cycle, so they are only kept for this walk and never shared with other pages
+        local_hashes = {}
+        definitions = {}
+        stack = [root]
+        on_stack = {root}
+        
+        def followed(target: int) -> bool:
+            return 0 < target < doc.xref_length() and target not in page_xrefs
+        
+        while stack:
+            xref = stack[-1]
+            if xref not in definitions:
+                definition = PDF_PARENT_KEY.sub('', doc.xref_object(xref, compressed=True))
+                targets = iter([int(match.group(1)) for match in PDF_REFERENCE.finditer(definition)])
+                definitions[xref] = (definition, targets)
+            definition, targets = definitions[xref]
+            
+            # Descend into the next reference that has not been hashed yet
+            child = next((target for target in targets
+                          if followed(target) and target not in on_stack
+                          and target not in object_hashes and target not in local_hashes), None)
+            if child is not None:
+                stack.append(child)
+                on_stack.add(child)
+                continue
+            
+            stack.pop()
+            on_stack.discard(xref)
+            in_cycle = False
+            
+            def resolve(match):
+                nonlocal in_cycle
+                target = int(match.group(1))
+                if target in page_xrefs:
+                    return 'page'
+                if not followed(target):
+                    return match.group(0)
+                if target in object_hashes:
+                    return object_hashes[target]
+                # Either part of a cycle hashed in this walk, or still on the stack
+                in_cycle = True
+                return local_hashes.get(target, 'cycle')
+            
+            digest = hashlib.sha256(PDF_REFERENCE.sub(resolve, definition).encode())
+            if doc.xref_is_stream(xref):
+                digest.update(doc.xref_stream_raw(xref) or b'')
+            if in_cycle:
+                local_hashes[xref] = digest.hexdigest()
+            else:
+                object_hashes[xref] = digest.hexdigest()
+            del definitions[xref]
+        
+        return object_hashes.get(root) or local_hashes[root]
+    
+    def _inherited_resources_hash(self, doc: fitz.Document, page_xref: int, object_hashes: Dict[int, str],
+                                  page_xrefs: Set[int]) -> str:
+        """Hash the Resources a page inherits from the page tree, if it has none of its own"""
+        xref = page_xref
+        while xref:
+            value_type, value = doc.xref_get_key(xref, "Resources")
+            if value_type != 'null':
+                if xref == page_xref:
+                    # Already covered by the page object itself
+                    return ''
+                return PDF_REFERENCE.sub(
+                    lambda match: self._object_hash(doc, int(match.group(1)), object_hashes, page_xrefs), value
+                )
+            value_type, value = doc.xref_get_key(xref, "Parent")
+            xref = int(value.split()[0]) if value_type == 'xref' else 0
+        return ''
+    
+    def _group_page_results(self, cache_keys: List[tuple], pages: List[int],
+                            text_content: List[Dict[str, Any]], tables: List[Dict[str, Any]],
+                            images: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+        """Group freshly extracted results by the cache key of their page"""
+        results = {page_num: {'text': None, 'tables': [], 'images': []} for page_num in pages}
+        
+        for page_data in text_content:
+            results[page_data['page']]['text'] = page_data
+        for table_data in tables:
+            results[int(table_data['page'])]['tables'].append(table_data)
+        for image_data in images:
+            results[image_data['page']]['images'].append(image_data)
+        
+        return {cache_keys[page_num - 1]: page_result for page_num, page_result in results.items()}
+    
+    def _update_page_cache(self, page_results: Dict[tuple, Dict[str, Any]]):
+        """Store per-page results, evicting the least recently used pages"""
+        with self.page_cache_lock:
+            for key, page_result in page_results.items():
+                if key in self.page_cache:
+                    self.page_cache.move_to_end(key)
+                    continue
+                size = approximate_size(page_result)
+                if size > self.PAGE_CACHE_MAX_BYTES:
+                    continue
+                self.page_cache[key] = (page_result, size)
+                self.page_cache_bytes += size
+            while (len(self.page_cache) > self.PAGE_CACHE_SIZE
+                   or self.page_cache_bytes > self.PAGE_CACHE_MAX_BYTES):
+                _, (_, size) = self.page_cache.popitem(last=False)
+                self.page_cache_bytes -= size
+    
+    def _assemble_pages(self, extracted_data: Dict[str, Any], cache_keys: List[tuple],
+                        page_results: Dict[tuple, Dict[str, Any]]):
+        """Build document-level sections, renumbering reused pages to their new position"""
+        for page_num, key in enumerate(cache_keys, 1):
+            page_result = page_results[key]
+            
+            if page_result['text']:
+                extracted_data['text_content'].append(dict(page_result['text'], page=page_num))
+            
+            for table_data in page_result['tables']:
+                extracted_data['tables'].append(dict(
+                    table_data,
+                    table_id=len(extracted_data['tables']) + 1,
+                    page=page_num
+                ))
+            
+            for image_data in page_result['images']:
+                img_index = image_data['image_id'].rsplit('_', 1)[-1]
+                extracted_data['images'].append(dict(
+                    image_data,
+                    image_id=f"img_{page_num}_{img_index}",
+                    page=page_num
+                ))
+    
+    def _extract_metadata(self, source: DocumentSource) -> Dict[str, Any]:
         """Extract PDF metadata"""
-        with fitz.open(pdf_path) as doc:
+        with source.open_fitz() as doc:
             metadata = doc.metadata
             return {
                 'title': metadata.get('title', ''),
@@ -78,31 +368,59 @@ class PDFProcessor:
                 'modification_date': metadata.get('modDate', '')
             }
     
-    def _extract_text(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract text content from each page"""
+    def _extract_text(self, source: DocumentSource, text_engine: str = DEFAULT_TEXT_ENGINE,
+                      pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Extract text content from each page (or only the given 1-based pages) with the selected engine"""
+        if text_engine == 'pdfplumber':
+            return self._extract_text_pdfplumber(source, pages)
+        return self._extract_text_pymupdf(source, pages)
+    
+    def _text_page_entry(self, page_num: int, page_text: str) -> Dict[str, Any]:
+        """Build a text_content entry; shared by all text engines"""
+        return {
+            'page': page_num,
+            'text': page_text.strip(),
+            'char_count': len(page_text),
+            'word_count': len(page_text.split())
+        }
+    
+    def _extract_text_pymupdf(self, source: DocumentSource, pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Extract text content from each page using PyMuPDF's native extractor"""
         text_content = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
+        with source.open_fitz() as doc:
+            for page_num in pages or range(1, len(doc) + 1):
+                page = doc.load_page(page_num - 1)
+                page_text = page.get_text("text")
+                if page_text and page_text.strip():
+                    text_content.append(self._text_page_entry(page_num, page_text))
+        
+        return text_content
+    
+    def _extract_text_pdfplumber(self, source: DocumentSource, pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Extract text content from each page using pdfplumber (layout-aware)"""
+        text_content = []
+        
+        with source.open_pdfplumber(pages) as pdf:
+            for page in pdf.pages:
+                page_num = page.page_number
                 page_text = page.extract_text()
                 if page_text:
-                    text_content.append({
-                        'page': page_num,
-                        'text': page_text.strip(),
-                        'char_count': len(page_text),
-                        'word_count': len(page_text.split())
-                    })
+                    text_content.append(self._text_page_entry(page_num, page_text))
         
         return text_content
     
-    def _extract_tables(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract tables using Camelot or pdfplumber"""
+    def _extract_tables(self, source: DocumentSource, pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Extract tables (from all pages or only the given 1-based pages) using Camelot or pdfplumber"""
         tables_data = []
         
         # Try Camelot first if available
         if CAMELOT_AVAILABLE:
             try:
-                tables = camelot.read_pdf(pdf_path, pages='all')
+                camelot_pages = ','.join(str(page_num) for page_num in pages) if pages else 'all'
+                # Camelot only reads from a path on disk
+                with source.as_path() as pdf_path:
+                    tables = self._camelot_read_pdf(pdf_path, camelot_pages)
                 
                 for i, table in enumerate(tables):
                     table_dict = {
@@ -121,8 +439,9 @@ class PDFProcessor:
         
         # Fallback to pdfplumber for table extraction
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
+            with source.open_pdfplumber(pages) as pdf:
+                for page in pdf.pages:
+                    page_num = page.page_number
                     tables = page.extract_tables()
                     for i, table in enumerate(tables):
                         if table and len(table) > 0:
@@ -147,12 +466,93 @@ class PDFProcessor:
         
         return tables_data
     
-    def _extract_images(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract images (with OCR if tesseract is available)"""
+    def _camelot_read_pdf(self, pdf_path: str, pages: str):
+        """Run Camelot with PyMuPDF rasterization instead of a Ghostscript process per page"""
+        try:
+            return camelot.read_pdf(pdf_path, pages=pages, backend=self.camelot_backend)
+        except TypeError:
+            # Camelot releases before pluggable backends
+            return camelot.read_pdf(pdf_path, pages=pages)
+    
+    def _ocr_pending(self, pending: List[tuple], timeout: Optional[float] = None):
+        """OCR queued full-resolution images in one batch and fill in their text
+        
+        Raises TimeoutError if the batch does not finish within `timeout` seconds.
+        """
+        if not pending:
+            return
+        try:
+            texts = self.ocr_engine.image_to_string_batch([pil_image for _, pil_image in pending], timeout)
+        except TimeoutError:
+            raise
+        except Exception as ocr_error:
+            print(f"OCR failed for {len(pending)} images: {ocr_error}")
+            texts = [OCR_FAILED] * len(pending)
+        for (image_info, _), text in zip(pending, texts):
+            image_info['ocr_text'] = text.strip()
+        pending.clear()
+    
+    def _ocr_deferred_images(self, source: DocumentSource, extracted_data: Dict[str, Any],
+                             images: List[Dict[str, Any]], budget: ConversionBudget):
+        """OCR images the image stage left for this process, within the budget
+        
+        The stage only hands back each image's xref; pixmaps are re-extracted here
+        OCR_BATCH_SIZE at a time, so full-resolution images are never all held at once.
+        An image drawn on several pages is OCRed once.
+        """
+        deferred = OrderedDict()
+        for image_info in images:
+            if '_ocr_xref' in image_info:
+                deferred.setdefault(image_info.pop('_ocr_xref'), []).append(image_info)
+        if not deferred:
+            return
+        
+        xrefs = list(deferred)
+        stage_budget = budget.stage_budget()
+        ocr_deadline = time.monotonic() + stage_budget if stage_budget is not None else None
+        
+        try:
+            with source.open_fitz() as doc:
+                for start in range(0, len(xrefs), self.OCR_BATCH_SIZE):
+                    if budget.cancelled():
+                        raise StageCancelled("Conversion cancelled")
+                    timeout = max(0.0, ocr_deadline - time.monotonic()) if ocr_deadline is not None else None
+                    pending = []
+                    for xref in xrefs[start:start + self.OCR_BATCH_SIZE]:
+                        image_infos = deferred[xref]
+                        try:
+                            pix = fitz.Pixmap(doc, xref)
+                            pending.append((image_infos[0], Image.open(io.BytesIO(pix.tobytes("png")))))
+                            pix = None  # Free memory
+                        except Exception as e:
+                            print(f"OCR image extraction error: {e}")
+                            image_infos[0]['ocr_text'] = OCR_FAILED
+                    self._ocr_pending(pending, timeout)
+                    for xref in xrefs[start:start + self.OCR_BATCH_SIZE]:
+                        for image_info in deferred[xref][1:]:
+                            image_info['ocr_text'] = deferred[xref][0]['ocr_text']
+        except (TimeoutError, StageCancelled) as e:
+            print(f"OCR stopped: {e}")
+            extracted_data['status'] = 'partial'
+            extracted_data['incomplete_sections'].append({
+                'section': 'ocr',
+                'reason': 'cancelled' if isinstance(e, StageCancelled) else 'timeout'
+            })
+    
+    def _extract_images(self, source: DocumentSource, pages: Optional[List[int]] = None,
+                        image_policy: Optional[ImagePolicy] = None, defer_ocr: bool = False) -> List[Dict[str, Any]]:
+        """Extract images from all pages or only the given 1-based pages (with OCR if tesseract is available)
+        
+        With `defer_ocr`, images are not OCRed here; the image's xref is left in
+        `_ocr_xref` for the caller to OCR.
+        """
         images_data = []
+        image_policy = image_policy or ImagePolicy()
+        # (image_info, full-resolution image) pairs waiting for batched OCR
+        pending_ocr = []
         
-        with fitz.open(pdf_path) as doc:
-            for page_num in range(len(doc)):
+        with source.open_fitz() as doc:
+            for page_num in [p - 1 for p in pages] if pages else range(len(doc)):
                 page = doc.load_page(page_num)
                 image_list = page.get_images()
                 
@@ -162,38 +562,44 @@ class PDFProcessor:
                         xref = img[0]
                         pix = fitz.Pixmap(doc, xref)
                         
-                        if pix.n < 5:  # GRAY or RGB
+                        if pix.n < 5 and not image_policy.skip(pix.width, pix.height):  # GRAY or RGB
                             # Convert to PIL Image
                             img_data = pix.tobytes("png")
                             pil_image = Image.open(io.BytesIO(img_data))
                             
-                            # Try OCR if tesseract is available
-                            ocr_text = ""
-                            if self.tesseract_available:
-                                try:
-                                    import pytesseract
-                                    ocr_text = pytesseract.image_to_string(pil_image)
-                                except Exception as ocr_error:
-                                    print(f"OCR failed for image {img_index + 1} on page {page_num + 1}: {ocr_error}")
-                                    ocr_text = "OCR extraction failed"
-                            else:
-                                ocr_text = "OCR not available (Tesseract not installed)"
-                            
-                            # Convert image to base64 for embedding
-                            buffered = io.BytesIO()
-                            pil_image.save(buffered, format="PNG")
-                            img_base64 = base64.b64encode(buffered.getvalue()).decode()
-                            
                             image_info = {
                                 'image_id': f"img_{page_num + 1}_{img_index + 1}",
                                 'page': page_num + 1,
                                 'width': pix.width,
                                 'height': pix.height,
-                                'ocr_text': ocr_text.strip(),
-                                'base64_data': img_base64,
-                                'format': 'PNG'
+                                'ocr_text': '',
+                                'base64_data': '',
+                                'format': image_policy.image_format
                             }
+                            
+                            # Queue OCR on the full-resolution image if tesseract is available
+                            if self.ocr_engine.available and defer_ocr:
+                                image_info['_ocr_xref'] = xref
+                            elif self.ocr_engine.available:
+                                pending_ocr.append((image_info, pil_image))
+                            else:
+                                image_info['ocr_text'] = "OCR not available (Tesseract not installed)"
+                            
+                            # Downscale/re-encode (on a copy), then convert to base64 for embedding
+                            if image_policy.data_mode == 'embed':
+                                if image_policy.is_passthrough():
+                                    encoded, width, height = img_data, pix.width, pix.height
+                                else:
+                                    encoded, width, height = image_policy.encode(pil_image)
+                                image_info['base64_data'] = base64.b64encode(encoded).decode()
+                                image_info['encoded_width'] = width
+                                image_info['encoded_height'] = height
+                            else:
+                                image_info['format'] = 'none'
                             images_data.append(image_info)
+                            
+                            if len(pending_ocr) >= self.OCR_BATCH_SIZE:
+                                self._ocr_pending(pending_ocr)
                         
                         pix = None  # Free memory
                         
@@ -201,4 +607,5 @@ class PDFProcessor:
                         print(f"Image extraction error: {e}")
                         continue
         
+        self._ocr_pending(pending_ocr)
         return images_data         
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict
+
+from .output_formats import OutputSerializer, write_atomic
+
+class OutputPreview:
+    """Serve previews of output files a page of lines at a time
+
+    A file's line offsets are indexed once (and cached per file version), so
+    each page request seeks to its lines instead of reading and splitting the
+    whole file. Lines longer than MAX_LINE_CHARS, such as embedded base64
+    images, are truncated. Binary formats are rendered to a text sidecar file once.
+    """
+
+    MAX_LINE_CHARS = 2000
+    INDEX_CACHE_SIZE = 64
+    READ_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, serializer: OutputSerializer):
+        self.serializer = serializer
+        # (path, mtime, size) -> offsets of every line start, plus the end of the file
+        self.line_indexes = OrderedDict()
+        self.line_indexes_lock = threading.Lock()
+
+    def read_all(self, file_path: str, fmt: str) -> str:
+        """The whole output as text"""
+        with open(file_path, 'rb') as file:
+            return self.serializer.to_text(file.read(), fmt)
+
+    def page(self, file_path: str, fmt: str, page: int, page_size: int) -> Dict[str, Any]:
+        """One page of `page_size` lines of the output as text"""
+        text_path = self._text_path(file_path, fmt)
+        offsets = self._line_offsets(text_path)
+        line_count = len(offsets) - 1
+        start = (page - 1) * page_size
+        
+        lines = []
+        with open(text_path, 'rb') as file:
+            for line_num in range(start, min(start + page_size, line_count)):
+                length = offsets[line_num + 1] - offsets[line_num]
+                file.seek(offsets[line_num])
+                # UTF-8 needs at most 4 bytes per character
+                raw = file.read(min(length, self.MAX_LINE_CHARS * 4))
+                line = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+                if len(raw) < length or len(line) > self.MAX_LINE_CHARS:
+                    line = f"{line[:self.MAX_LINE_CHARS]}... [line truncated, {length} bytes]"
+                lines.append(line)
+        
+        return {
+            "xml_content": "\n".join(lines),
+            "page": page,
+            "page_size": page_size,
+            "total_lines": line_count,
+            "total_pages": max(1, -(-line_count // page_size))
+        }
+
+    def _text_path(self, file_path: str, fmt: str) -> str:
+        """Path of a text rendering of the output; binary formats get a sidecar file"""
+        if fmt != 'msgpack':
+            return file_path
+        text_path = file_path + '.preview.txt'
+        if not os.path.exists(text_path) or os.path.getmtime(text_path) < os.path.getmtime(file_path):
+            write_atomic(text_path, self.read_all(file_path, fmt).encode('utf-8'))
+        return text_path
+
+    def _line_offsets(self, text_path: str) -> array:
+        stat = os.stat(text_path)
+        key = (text_path, stat.st_mtime_ns, stat.st_size)
+        with self.line_indexes_lock:
+            if key in self.line_indexes:
+                self.line_indexes.move_to_end(key)
+                return self.line_indexes[key]
+        
+        # Scan in fixed-size chunks, so a huge single line is never held in memory
+        offsets = array('q', [0])
+        position = 0
+        with open(text_path, 'rb') as file:
+            while True:
+                chunk = file.read(self.READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                index = chunk.find(b'\n')
+                while index != -1:
+                    offsets.append(position + index + 1)
+                    index = chunk.find(b'\n', index + 1)
+                position += len(chunk)
+        if offsets[-1] != position:
+            # Last line has no trailing newline
+            offsets.append(position)
+        
+        with self.line_indexes_lock:
+            self.line_indexes[key] = offsets
+            while len(self.line_indexes) > self.INDEX_CACHE_SIZE:
+                self.line_indexes.popitem(last=False)
+        return offsets
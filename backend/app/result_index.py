@@ -0,0 +1,116 @@
+import sqlite3
+import time
+import os
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+class ResultIndex:
+    """SQLite-backed index of conversion jobs and their output files
+
+    The index is shared by every worker process, so a download or preview
+    finds the output no matter which worker produced it. A connection is
+    opened per operation, which keeps the index safe to use after fork.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    filename TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    text_engine TEXT NOT NULL,
+                    image_policy TEXT NOT NULL DEFAULT '',
+                    page_count INTEGER NOT NULL,
+                    complete INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL
+                )
+            """)
+            # Add columns introduced after the index was first created
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(results)")]
+            if 'complete' not in columns:
+                conn.execute("ALTER TABLE results ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+            if 'image_policy' not in columns:
+                conn.execute("ALTER TABLE results ADD COLUMN image_policy TEXT NOT NULL DEFAULT ''")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS results_by_content
+                ON results (content_hash, text_engine, format)
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker_pid INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    error TEXT
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_job(self, filename: str, content_hash: str) -> int:
+        """Record a conversion job as running in this worker"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (filename, content_hash, status, worker_pid, started_at) "
+                "VALUES (?, ?, 'running', ?, ?)",
+                (filename, content_hash, os.getpid(), time.time())
+            )
+            return cursor.lastrowid
+
+    def finish_job(self, job_id: int, error: Optional[str] = None, partial: bool = False):
+        """Mark a job as succeeded, partial, or failed with an error message"""
+        if error:
+            status = 'failed'
+        else:
+            status = 'partial' if partial else 'succeeded'
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (status, time.time(), error, job_id)
+            )
+
+    def add_result(self, filename: str, path: str, fmt: str, content_hash: str, text_engine: str,
+                   page_count: int, complete: bool = True, image_policy: str = ''):
+        """Register a generated output file"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(filename, path, format, content_hash, text_engine, image_policy, page_count, complete, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (filename, path, fmt, content_hash, text_engine, image_policy, page_count, int(complete),
+                 time.time())
+            )
+
+    def get_result(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Look up an output file by its public file name"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM results WHERE filename = ?", (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def find_result(self, content_hash: str, text_engine: str, fmt: str,
+                    image_policy: str = '') -> Optional[Dict[str, Any]]:
+        """Find the newest complete output for the same PDF, engine, format and image policy"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM results WHERE content_hash = ? AND text_engine = ? AND format = ? "
+                "AND image_policy = ? AND complete = 1 ORDER BY created_at DESC LIMIT 1",
+                (content_hash, text_engine, fmt, image_policy)
+            ).fetchone()
+        return dict(row) if row else None
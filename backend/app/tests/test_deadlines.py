@@ -0,0 +1,105 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+
+import pytest
+
+from app.deadlines import ConversionBudget, StageCancelled, StageError, StageTimeout, run_stage
+
+
+def sleep_for(seconds):
+    time.sleep(seconds)
+    return 'done'
+
+
+def crash_with_exit():
+    os._exit(3)
+
+
+def crash_with_sigkill():
+    # What the kernel's OOM killer does to a stage worker
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def raise_error():
+    raise ValueError("boom")
+
+
+def spawn_sleeper(pid_file):
+    """Start a child (like Ghostscript or Tesseract) and wait on it"""
+    child = subprocess.Popen(['sleep', '30'])
+    with open(pid_file, 'w') as f:
+        f.write(str(child.pid))
+    child.wait()
+
+
+def process_gone(pid):
+    """True once pid has exited (a zombie awaiting reaping counts as exited)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] == 'Z'
+    except FileNotFoundError:
+        return True
+
+
+def test_stage_returns_result():
+    assert run_stage(sleep_for, (0,), ConversionBudget(stage_timeout=5)) == 'done'
+
+
+def test_sleeping_stage_times_out():
+    start = time.monotonic()
+    with pytest.raises(StageTimeout):
+        run_stage(sleep_for, (30,), ConversionBudget(stage_timeout=0.5))
+    assert time.monotonic() - start < 5
+
+
+def test_overall_deadline_caps_stage():
+    with pytest.raises(StageTimeout):
+        run_stage(sleep_for, (30,), ConversionBudget(timeout=0.5, stage_timeout=60))
+
+
+def test_cancel_check_stops_stage():
+    start = time.monotonic()
+    with pytest.raises(StageCancelled):
+        run_stage(sleep_for, (30,), ConversionBudget(cancel_check=lambda: time.monotonic() - start > 0.5))
+    assert time.monotonic() - start < 5
+
+
+def test_client_disconnect_cancels_stage():
+    # The endpoint sets this event from its disconnect watcher
+    disconnected = threading.Event()
+    threading.Timer(0.5, disconnected.set).start()
+    with pytest.raises(StageCancelled):
+        run_stage(sleep_for, (30,), ConversionBudget(timeout=60, cancel_check=disconnected.is_set))
+
+
+def test_already_cancelled_stage_does_not_start():
+    with pytest.raises(StageCancelled):
+        run_stage(sleep_for, (30,), ConversionBudget(cancel_check=lambda: True))
+
+
+@pytest.mark.parametrize('crash', [crash_with_exit, crash_with_sigkill])
+def test_crashing_stage_raises_stage_error(crash):
+    with pytest.raises(StageError):
+        run_stage(crash, (), ConversionBudget(stage_timeout=5))
+
+
+def test_stage_exception_raises_stage_error():
+    with pytest.raises(StageError, match="boom"):
+        run_stage(raise_error, (), ConversionBudget(stage_timeout=5))
+
+
+@pytest.mark.skipif(not hasattr(os, 'killpg') or not os.path.isdir('/proc'),
+                    reason="needs process groups and /proc")
+def test_timeout_kills_stage_process_group(tmp_path):
+    pid_file = tmp_path / 'child.pid'
+    with pytest.raises(StageTimeout):
+        run_stage(spawn_sleeper, (str(pid_file),), ConversionBudget(stage_timeout=1))
+
+    child_pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while not process_gone(child_pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert process_gone(child_pid)
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.image_policy import ImagePolicy
+
+
+def make_image(width, height, mode='RGB'):
+    return Image.new(mode, (width, height), color=(200, 40, 40, 255) if mode == 'RGBA' else (200, 40, 40))
+
+
+def decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_default_policy_keeps_native_png():
+    policy = ImagePolicy()
+    assert policy.is_passthrough()
+
+    data, width, height = policy.encode(make_image(300, 200))
+    assert (width, height) == (300, 200)
+    assert decode(data).format == 'PNG'
+
+
+def test_encode_downscales_to_max_dimension_keeping_aspect_ratio():
+    policy = ImagePolicy(max_dimension=100)
+    assert not policy.is_passthrough()
+
+    image = make_image(400, 200)
+    data, width, height = policy.encode(image)
+    assert (width, height) == (100, 50)
+    assert decode(data).size == (100, 50)
+    # The caller's image (used for OCR) is left at full resolution
+    assert image.size == (400, 200)
+
+
+def test_encode_leaves_small_images_at_native_size():
+    data, width, height = ImagePolicy(max_dimension=500).encode(make_image(40, 30))
+    assert (width, height) == (40, 30)
+
+
+@pytest.mark.parametrize("image_format, expected", [('jpeg', 'JPEG'), ('jpg', 'JPEG'), ('webp', 'WEBP')])
+def test_encode_uses_requested_format(image_format, expected):
+    data, _, _ = ImagePolicy(image_format=image_format).encode(make_image(60, 40, mode='RGBA'))
+    assert decode(data).format == expected
+
+
+def test_skip_images_smaller_than_min_size_on_either_side():
+    policy = ImagePolicy(min_size=32)
+    assert policy.skip(31, 500)
+    assert policy.skip(500, 31)
+    assert not policy.skip(32, 32)
+    assert not ImagePolicy().skip(1, 1)
+
+
+def test_cache_key_ignores_quality_for_lossless_formats():
+    assert ImagePolicy(quality=50).cache_key() == ImagePolicy(quality=90).cache_key() == "png-max0-min0"
+    assert ImagePolicy(image_format='jpeg', quality=50).cache_key() != ImagePolicy(image_format='jpeg', quality=90).cache_key()
+    assert ImagePolicy(image_format='webp', quality=70, max_dimension=800, min_size=16).cache_key() == "webp-q70-max800-min16"
+
+
+def test_cache_key_in_metadata_mode_only_depends_on_min_size():
+    assert ImagePolicy(data_mode='metadata', image_format='jpeg', quality=10).cache_key() == "metadata-min0"
+    assert ImagePolicy(data_mode='metadata', min_size=8).cache_key() == "metadata-min8"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {'image_format': 'gif'},
+    {'data_mode': 'thumbnail'},
+    {'max_dimension': 0},
+    {'quality': 0},
+    {'quality': 101},
+])
+def test_invalid_options_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        ImagePolicy(**kwargs)
@@ -0,0 +1,108 @@
+import subprocess
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from app import ocr_engine
+from app.ocr_engine import OCREngine, OCR_FAILED
+
+
+def make_images(count):
+    return [Image.new('L', (40, 20), 255) for _ in range(count)]
+
+
+class FakeTessAPI:
+    """Stands in for tesserocr's PyTessBaseAPI"""
+
+    def __init__(self, lang='eng'):
+        self.image = None
+
+    def SetImage(self, image):
+        self.image = image
+
+    def Recognize(self, timeout=0):
+        return True
+
+    def GetUTF8Text(self):
+        return f"text {self.image.size[0]}"
+
+    def Clear(self):
+        self.image = None
+
+
+@pytest.fixture
+def cli_engine(monkeypatch):
+    monkeypatch.setattr(ocr_engine, 'TESSEROCR_AVAILABLE', False)
+    return OCREngine(tesseract_available=True)
+
+
+@pytest.fixture
+def api_engine(monkeypatch):
+    monkeypatch.setattr(ocr_engine, 'TESSEROCR_AVAILABLE', True)
+    monkeypatch.setattr(ocr_engine, 'PyTessBaseAPI', FakeTessAPI, raising=False)
+    return OCREngine(tesseract_available=False, pool_size=1)
+
+
+def fake_run(outputs, calls):
+    """subprocess.run replacement answering each tesseract call with the next output"""
+    def run(args, **kwargs):
+        calls.append(args)
+        output = outputs.pop(0)
+        if isinstance(output, Exception):
+            raise output
+        return subprocess.CompletedProcess(args, 0, stdout=output, stderr=b'')
+    return run
+
+
+def test_file_list_output_is_split_on_form_feeds(cli_engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr_engine.subprocess, 'run', fake_run([b"first\fsecond\fthird\f"], calls))
+
+    assert cli_engine.image_to_string_batch(make_images(3)) == ["first", "second", "third"]
+    assert len(calls) == 1
+    assert calls[0][1].endswith("images.txt")
+
+
+def test_unclear_page_boundaries_fall_back_to_one_run_per_image(cli_engine, monkeypatch):
+    calls = []
+    outputs = [b"first and second run together", b"first", subprocess.CalledProcessError(1, 'tesseract')]
+    monkeypatch.setattr(ocr_engine.subprocess, 'run', fake_run(outputs, calls))
+
+    assert cli_engine.image_to_string_batch(make_images(2)) == ["first", OCR_FAILED]
+    assert [call[1].rsplit('/', 1)[-1] for call in calls] == ["images.txt", "0.png", "1.png"]
+
+
+def test_file_list_timeout_raises(cli_engine, monkeypatch):
+    outputs = [subprocess.TimeoutExpired('tesseract', 1)]
+    monkeypatch.setattr(ocr_engine.subprocess, 'run', fake_run(outputs, []))
+
+    with pytest.raises(TimeoutError):
+        cli_engine.image_to_string_batch(make_images(2), timeout=1)
+
+
+def test_spent_budget_raises_before_running(cli_engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ocr_engine.subprocess, 'run', fake_run([], calls))
+
+    with pytest.raises(TimeoutError):
+        cli_engine.image_to_string_batch(make_images(1), timeout=0)
+    assert calls == []
+
+
+def test_api_pool_is_reused(api_engine):
+    assert api_engine.image_to_string_batch(make_images(3)) == ["text 40"] * 3
+    assert api_engine._created == 1
+
+
+def test_busy_api_pool_times_out(api_engine):
+    busy_api = api_engine._acquire_api()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        api_engine.image_to_string_batch(make_images(1), timeout=0.3)
+    assert time.monotonic() - start < 2
+
+    # Once the API is returned, waiting callers get it
+    threading.Timer(0.1, api_engine._pool.put, args=(busy_api,)).start()
+    assert api_engine.image_to_string_batch(make_images(1), timeout=5) == ["text 40"]
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.output_formats import OutputSerializer, MSGPACK_AVAILABLE
+
+
+@pytest.fixture
+def serializer():
+    return OutputSerializer()
+
+
+def extracted_data():
+    return {
+        'filename': 'report.pdf',
+        'page_count': 3,
+        'status': 'complete',
+        'text_content': [
+            {'page': 1, 'text': 'first page'},
+            {'page': 3, 'text': 'third page'},
+        ],
+        'tables': [
+            {'page': 1, 'table_index': 0, 'data': [['a', 'b']]},
+            {'page': 1, 'table_index': 1, 'data': [['c']]},
+        ],
+        'images': [
+            {'page': 3, 'image_index': 0, 'width': 10, 'height': 20},
+        ],
+    }
+
+
+def test_ndjson_has_document_line_then_one_line_per_page(serializer):
+    lines = serializer.serialize(extracted_data(), 'ndjson').decode('utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert records[0] == {'filename': 'report.pdf', 'page_count': 3, 'status': 'complete', 'type': 'document'}
+    assert [record['page'] for record in records[1:]] == [1, 2, 3]
+    assert all(record['type'] == 'page' for record in records[1:])
+
+    first, second, third = records[1:]
+    assert first['text']['text'] == 'first page'
+    assert [table['table_index'] for table in first['tables']] == [0, 1]
+    assert first['images'] == []
+    # A page without extracted content still gets a line
+    assert second == {'type': 'page', 'page': 2, 'text': None, 'tables': [], 'images': []}
+    assert third['text']['text'] == 'third page'
+    assert third['images'][0]['width'] == 10
+
+
+def test_format_for_filename(serializer):
+    assert serializer.format_for_filename('report_1.json') == 'json'
+    assert serializer.format_for_filename('report_1.NDJSON') == 'ndjson'
+    assert serializer.format_for_filename('report_1.msgpack') == 'msgpack'
+    assert serializer.format_for_filename('report_1.xml') == 'xml'
+    # Unknown or missing extensions fall back to XML
+    assert serializer.format_for_filename('report_1.txt') == 'xml'
+    assert serializer.format_for_filename('report_1') == 'xml'
+
+
+def test_unsupported_format_is_rejected(serializer):
+    with pytest.raises(ValueError):
+        serializer.serialize(extracted_data(), 'yaml')
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_msgpack_preview_round_trip(serializer):
+    data = extracted_data()
+    content = serializer.serialize(data, 'msgpack')
+
+    assert json.loads(serializer.to_text(content, 'msgpack')) == data
@@ -0,0 +1,241 @@
+import os
+import time
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+
+from app.pdf_processor import PDFProcessor
+from app.document_source import DocumentSource
+
+
+def make_pdf(page_texts):
+    """Build a PDF with one page per text"""
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        page.insert_text((72, 72), text, fontsize=12)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_stamped_pdf(page_texts):
+    """Build a PDF whose pages only draw a Form XObject holding the text (q /fzFrm0 Do Q)"""
+    src = fitz.open(stream=make_pdf(page_texts), filetype='pdf')
+    doc = fitz.open()
+    for page_num in range(len(src)):
+        page = doc.new_page()
+        page.show_pdf_page(page.rect, src, page_num)
+    content = doc.tobytes()
+    doc.close()
+    src.close()
+    return content
+
+
+def make_linked_pdf(page_texts):
+    """Build a PDF where each page has a link to the next one"""
+    doc = fitz.open(stream=make_pdf(page_texts), filetype='pdf')
+    for page_num in range(len(doc) - 1):
+        doc[page_num].insert_link({
+            'kind': fitz.LINK_GOTO,
+            'page': page_num + 1,
+            'from': fitz.Rect(72, 100, 200, 120),
+            'to': fitz.Point(0, 0)
+        })
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_image_pdf(image_count, repeat_first_image=False):
+    """Build a one-page PDF with distinct small images (optionally drawing the first one twice)"""
+    doc = fitz.open()
+    page = doc.new_page()
+    xrefs = []
+    for index in range(image_count):
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 20, 20), False)
+        pix.set_rect(pix.irect, (index * 10 % 256, 100, 200))
+        rect = fitz.Rect(10 + (index % 10) * 50, 10 + (index // 10) * 50, 50 + (index % 10) * 50,
+                         50 + (index // 10) * 50)
+        xrefs.append(page.insert_image(rect, pixmap=pix))
+    if repeat_first_image:
+        doc.new_page().insert_image(fitz.Rect(10, 10, 50, 50), xref=xrefs[0])
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+class RecordingOCREngine:
+    """Stands in for OCREngine, recording the size of every batch"""
+
+    available = True
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def image_to_string_batch(self, images, timeout=None):
+        if self.error:
+            raise self.error
+        self.batches.append(len(images))
+        return [f"text {len(self.batches)}-{index}" for index in range(len(images))]
+
+
+class SlowTablesProcessor(PDFProcessor):
+    """Table stage that outlives any reasonable budget (stages are pickled, so no lambdas)"""
+
+    def _extract_tables(self, *args):
+        time.sleep(30)
+
+
+class CrashingTablesProcessor(PDFProcessor):
+    """Table stage whose process dies, as when it is OOM-killed"""
+
+    def _extract_tables(self, *args):
+        os._exit(1)
+
+
+@pytest.fixture
+def processor():
+    return PDFProcessor()
+
+
+def test_fingerprint_is_stable_for_identical_pages(processor):
+    first = processor._page_fingerprints(DocumentSource.from_bytes(make_pdf(["alpha", "beta"])))
+    second = processor._page_fingerprints(DocumentSource.from_bytes(make_pdf(["beta"])))
+    assert first[1] == second[0]
+    assert first[0] != first[1]
+
+
+def test_fingerprint_covers_form_xobject_content(processor):
+    # Both pages have the same content stream; only the form they draw differs
+    fingerprints = processor._page_fingerprints(
+        DocumentSource.from_bytes(make_stamped_pdf(["first contract", "second contract"]))
+    )
+    assert fingerprints[0] != fingerprints[1]
+
+
+def test_linked_pages_have_distinct_fingerprints(processor, monkeypatch):
+    # Only text matters here; table detection on 300 pages would dominate the run
+    monkeypatch.setattr(processor, '_extract_tables', lambda *args: [])
+    page_texts = [f"page {page_num}" for page_num in range(1, 301)]
+    fingerprints = processor._page_fingerprints(DocumentSource.from_bytes(make_linked_pdf(page_texts)))
+    assert len(set(fingerprints)) == len(page_texts)
+
+    extracted = processor.process_pdf(make_linked_pdf(page_texts))
+    assert [entry['text'].strip() for entry in extracted['text_content']] == page_texts
+
+
+def test_editing_a_linked_page_keeps_the_others_reusable(processor):
+    page_texts = [f"page {page_num}" for page_num in range(1, 11)]
+    processor.process_pdf(make_linked_pdf(page_texts))
+    extracted = processor.process_pdf(make_linked_pdf(page_texts[:-1] + ["edited last page"]))
+
+    assert extracted['pages_reused'] == 9
+    assert "edited last page" in extracted['text_content'][9]['text']
+
+
+def test_stamped_pages_do_not_share_cached_text(processor):
+    processor.process_pdf(make_stamped_pdf(["first contract"]))
+    extracted = processor.process_pdf(make_stamped_pdf(["second contract"]))
+    assert extracted['pages_reused'] == 0
+    assert "second contract" in extracted['text_content'][0]['text']
+
+
+def test_moved_pages_are_reused_and_renumbered(processor):
+    processor.process_pdf(make_pdf(["intro page", "terms page"]))
+    extracted = processor.process_pdf(make_pdf(["new cover page", "intro page", "terms page"]))
+
+    assert extracted['page_count'] == 3
+    assert extracted['pages_reused'] == 2
+    pages = {entry['page']: entry['text'] for entry in extracted['text_content']}
+    assert "new cover page" in pages[1]
+    assert "intro page" in pages[2]
+    assert "terms page" in pages[3]
+
+
+def test_changed_page_is_reprocessed(processor):
+    processor.process_pdf(make_pdf(["intro page", "price: 100"]))
+    extracted = processor.process_pdf(make_pdf(["intro page", "price: 250"]))
+
+    assert extracted['pages_reused'] == 1
+    assert "price: 250" in extracted['text_content'][1]['text']
+
+
+def test_page_cache_is_bounded_by_bytes(processor):
+    processor.PAGE_CACHE_MAX_BYTES = 1
+    processor.process_pdf(make_pdf(["intro page"]))
+
+    assert len(processor.page_cache) == 0
+    assert processor.page_cache_bytes == 0
+    assert processor.process_pdf(make_pdf(["intro page"]))['pages_reused'] == 0
+
+
+def test_slow_stage_gives_partial_result():
+    processor = SlowTablesProcessor()
+    extracted = processor.process_pdf(make_pdf(["intro page"]), stage_timeout=0.5)
+
+    assert extracted['status'] == 'partial'
+    assert extracted['incomplete_sections'] == [{'section': 'tables', 'reason': 'timeout'}]
+    assert "intro page" in extracted['text_content'][0]['text']
+    assert len(processor.page_cache) == 0
+
+
+def test_crashed_stage_gives_partial_result():
+    processor = CrashingTablesProcessor()
+    extracted = processor.process_pdf(make_pdf(["intro page"]), stage_timeout=5)
+
+    assert extracted['status'] == 'partial'
+    assert extracted['incomplete_sections'] == [{'section': 'tables', 'reason': 'error'}]
+    assert "intro page" in extracted['text_content'][0]['text']
+
+
+def test_cancelled_conversion_gives_partial_result(processor):
+    extracted = processor.process_pdf(make_pdf(["intro page"]), cancel_check=lambda: True)
+
+    assert extracted['status'] == 'partial'
+    assert {entry['reason'] for entry in extracted['incomplete_sections']} == {'cancelled'}
+
+
+def test_ocr_runs_in_bounded_batches(processor):
+    processor.ocr_engine = RecordingOCREngine()
+    processor.OCR_BATCH_SIZE = 4
+    extracted = processor.process_pdf(make_image_pdf(10, repeat_first_image=True), stage_timeout=30)
+
+    # The image drawn on both pages is OCRed once and shares its text
+    assert processor.ocr_engine.batches == [4, 4, 2]
+    assert len(extracted['images']) == 11
+    assert extracted['images'][0]['ocr_text'] == extracted['images'][-1]['ocr_text'] == "text 1-0"
+    assert all('_ocr_xref' not in image for image in extracted['images'])
+    assert extracted['status'] == 'complete'
+
+
+def test_ocr_timeout_gives_partial_result(processor):
+    processor.ocr_engine = RecordingOCREngine(error=TimeoutError("OCR ran out of time"))
+    extracted = processor.process_pdf(make_image_pdf(2), stage_timeout=30)
+
+    assert extracted['status'] == 'partial'
+    assert extracted['incomplete_sections'] == [{'section': 'ocr', 'reason': 'timeout'}]
+    assert len(extracted['images']) == 2
+
+
+def test_camelot_renders_the_requested_page(processor):
+    pytest.importorskip("camelot")
+    doc = fitz.open()
+    doc.new_page()
+    page = doc.new_page()
+    for row in range(4):
+        page.draw_line((72, 100 + row * 30), (372, 100 + row * 30))
+    for column in range(4):
+        page.draw_line((72 + column * 100, 100), (72 + column * 100, 190))
+    for row in range(3):
+        for column in range(3):
+            page.insert_text((80 + column * 100, 120 + row * 30), f"r{row}c{column}")
+    content = doc.tobytes()
+    doc.close()
+
+    tables = processor.process_pdf(content)['tables']
+    assert tables[0]['page'] == 2
+    assert tables[0]['data'][2][2] == "r2c2"
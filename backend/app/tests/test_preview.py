@@ -0,0 +1,64 @@
+import pytest
+
+from app.output_formats import OutputSerializer, MSGPACK_AVAILABLE
+from app.preview import OutputPreview
+
+
+@pytest.fixture
+def preview():
+    return OutputPreview(OutputSerializer())
+
+
+def write_lines(path, lines, trailing_newline=True):
+    path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""), encoding='utf-8')
+    return str(path)
+
+
+def test_pages_cover_every_line(preview, tmp_path):
+    lines = [f"<line n='{index}'/>" for index in range(25)]
+    file_path = write_lines(tmp_path / "out.xml", lines)
+
+    pages = [preview.page(file_path, 'xml', page, 10) for page in (1, 2, 3)]
+    assert [page['xml_content'] for page in pages] == [
+        "\n".join(lines[:10]), "\n".join(lines[10:20]), "\n".join(lines[20:])
+    ]
+    assert pages[0]['total_lines'] == 25
+    assert pages[0]['total_pages'] == 3
+    assert preview.page(file_path, 'xml', 4, 10)['xml_content'] == ""
+
+
+def test_last_line_without_newline_is_counted(preview, tmp_path):
+    file_path = write_lines(tmp_path / "out.xml", ["a", "b", "c"], trailing_newline=False)
+    page = preview.page(file_path, 'xml', 1, 10)
+    assert page['xml_content'] == "a\nb\nc"
+    assert page['total_lines'] == 3
+
+
+def test_long_lines_are_truncated(preview, tmp_path):
+    preview.MAX_LINE_CHARS = 50
+    file_path = write_lines(tmp_path / "out.xml", ["<image>", "A" * 10000, "</image>"])
+
+    lines = preview.page(file_path, 'xml', 1, 10)['xml_content'].split("\n")
+    assert lines[0] == "<image>"
+    assert lines[1] == "A" * 50 + "... [line truncated, 10001 bytes]"
+    assert lines[2] == "</image>"
+
+
+def test_line_index_is_built_once_per_file_version(preview, tmp_path):
+    file_path = write_lines(tmp_path / "out.xml", ["a", "b"])
+    preview.page(file_path, 'xml', 1, 1)
+    preview.page(file_path, 'xml', 2, 1)
+    assert len(preview.line_indexes) == 1
+
+    write_lines(tmp_path / "out.xml", ["a", "b", "c", "d"])
+    assert preview.page(file_path, 'xml', 1, 1)['total_lines'] == 4
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack is not installed")
+def test_msgpack_is_rendered_to_text_once(preview, tmp_path):
+    file_path = tmp_path / "out.msgpack"
+    file_path.write_bytes(OutputSerializer().serialize({'page_count': 2, 'text_content': []}, 'msgpack'))
+
+    page = preview.page(str(file_path), 'msgpack', 1, 100)
+    assert '"page_count": 2' in page['xml_content']
+    assert (tmp_path / "out.msgpack.preview.txt").exists()
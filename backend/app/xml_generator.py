@@ -23,6 +23,16 @@ class XMLGenerator:
         SubElement(doc_info, 'page_count').text = str(extracted_data.get('page_count', 0))
         SubElement(doc_info, 'total_tables').text = str(len(extracted_data.get('tables', [])))
         SubElement(doc_info, 'total_images').text = str(len(extracted_data.get('images', [])))
+        SubElement(doc_info, 'status').text = extracted_data.get('status', 'complete')
+        
+        # List sections cut short by a deadline or cancellation
+        incomplete_sections = extracted_data.get('incomplete_sections', [])
+        if incomplete_sections:
+            incomplete_element = SubElement(doc_info, 'incomplete_sections')
+            for incomplete in incomplete_sections:
+                section_element = SubElement(incomplete_element, 'section')
+                section_element.set('name', str(incomplete.get('section', '')))
+                section_element.set('reason', str(incomplete.get('reason', '')))
         
         # Add text content
         self._add_text_content(root, extracted_data.get('text_content', []))
@@ -110,6 +120,9 @@ class XMLGenerator:
             image_element.set('width', str(image_data.get('width', 0)))
             image_element.set('height', str(image_data.get('height', 0)))
             image_element.set('format', str(image_data.get('format', 'PNG')))
+            if 'encoded_width' in image_data:
+                image_element.set('encoded_width', str(image_data['encoded_width']))
+                image_element.set('encoded_height', str(image_data['encoded_height']))
             
             # Add OCR text
             if image_data.get('ocr_text'):
@@ -0,0 +1,86 @@
+"""Benchmark conversion time and output size for each image policy.
+
+Run from the backend directory:
+    python -m benchmarks.bench_image_policies [file.pdf ...] [--repeat 3]
+
+Without input files a PDF with large scanned-like images is generated.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from app.document_source import DocumentSource
+from app.image_policy import ImagePolicy
+from app.pdf_processor import PDFProcessor
+from app.xml_generator import XMLGenerator
+
+POLICIES = {
+    'native-png': ImagePolicy(),
+    'jpeg-150': ImagePolicy(max_dimension=1275, image_format='JPEG', quality=80),
+    'webp-150': ImagePolicy(max_dimension=1275, image_format='WEBP', quality=80),
+    'thumbnail': ImagePolicy(max_dimension=256, image_format='JPEG', quality=70),
+    'skip-small': ImagePolicy(min_size=600),
+    'metadata-only': ImagePolicy(data_mode='metadata'),
+}
+
+
+def generate_sample_pdf(path: str, pages: int):
+    """Write a PDF with one page-sized noisy image (like a 600-DPI scan) and a small logo per page"""
+    doc = fitz.open()
+    rng = random.Random(0)
+    for _ in range(pages):
+        page = doc.new_page()
+        scan = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 2550, 3300), False)
+        scan.set_rect(scan.irect, (255,))
+        for _ in range(400):
+            x, y = rng.randrange(0, 2400), rng.randrange(0, 3200)
+            scan.set_rect(fitz.IRect(x, y, x + rng.randrange(20, 150), y + 12), (rng.randrange(0, 128),))
+        page.insert_image(page.rect, pixmap=scan)
+        logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+        logo.set_rect(logo.irect, (200, 30, 30))
+        page.insert_image(fitz.Rect(500, 20, 564, 84), pixmap=logo)
+    doc.save(path)
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    processor = PDFProcessor()
+    xml_generator = XMLGenerator()
+    files = list(args.files)
+    generated = None
+    if not files:
+        generated = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf').name
+        generate_sample_pdf(generated, args.pages)
+        files = [generated]
+
+    try:
+        for pdf_path in files:
+            print(f"\n{os.path.basename(pdf_path)}")
+            print(f"{'policy':<15}{'images':>8}{'seconds':>10}{'image bytes':>14}{'xml bytes':>14}")
+            source = DocumentSource.from_path(pdf_path)
+            for name, policy in POLICIES.items():
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    images = processor._extract_images(source, image_policy=policy)
+                    best = min(best, time.perf_counter() - start)
+                image_bytes = sum(len(image['base64_data']) for image in images)
+                xml_bytes = len(xml_generator.generate_xml({'images': images, 'page_count': 0}).encode('utf-8'))
+                print(f"{name:<15}{len(images):>8}{best:>10.3f}{image_bytes:>14}{xml_bytes:>14}")
+    finally:
+        if generated:
+            os.unlink(generated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Load-test the conversion, download and preview endpoints.
+
+Run from the backend directory. Start the app in-process:
+    python -m benchmarks.bench_load --concurrency 8 --duration 30
+or target a running server (pass its PID, e.g. the gunicorn master, to sample
+the RSS of it and all its workers and stage processes):
+    python -m benchmarks.bench_load --url http://localhost:8000 --server-pid 1234 --rate 5
+
+Throughput, p50/p95/p99 latency, error rate and server RSS over time are
+printed and written as JSON (--report) so runs can be compared. In open-loop
+mode latency is measured from each request's scheduled send time, so time
+spent waiting for a free client thread counts. In-process RSS covers the
+client as well as the server.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import fitz  # PyMuPDF
+import requests
+
+
+def generate_pdf(pages: int) -> bytes:
+    """Build a PDF with text and a ruled table on every page"""
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page()
+        lines = [f"Page {page_num} line {line}: load test content for the converter"
+                 for line in range(30)]
+        page.insert_text((72, 72), "\n".join(lines), fontsize=9)
+        for row in range(6):
+            y = 400 + row * 20
+            page.draw_line((72, y), (472, y))
+            for col in range(4):
+                page.insert_text((76 + col * 100, y + 14), f"r{row}c{col}", fontsize=9)
+        for col in range(5):
+            page.draw_line((72 + col * 100, 400), (72 + col * 100, 500))
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def stamp_pdf(content: bytes, stamp: str) -> bytes:
+    """Draw `stamp` on every page, so every page fingerprint changes and no page is reused"""
+    doc = fitz.open(stream=content, filetype='pdf')
+    for page in doc:
+        page.insert_text((72, 760), stamp, fontsize=6)
+    stamped = doc.tobytes()
+    doc.close()
+    return stamped
+
+
+def read_process_rss(pid: int) -> int:
+    """Resident set size of one process in bytes, or 0 if unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree(pid: int) -> list:
+    """pid and all of its descendants, found by walking /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                parent = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    tree = [pid]
+    for current in tree:
+        tree.extend(children.get(current, []))
+    return tree
+
+
+def read_rss(pid: int) -> int:
+    """Summed RSS in bytes of a process and all its descendants, or 0 if unavailable
+
+    Under gunicorn the given PID is the master; the workers and their forked
+    stage processes hold the memory, so the whole tree is counted. Pages
+    shared after fork are counted once per process, which overstates the total.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return sum(read_process_rss(tree_pid) for tree_pid in process_tree(pid)) if os.path.isdir('/proc') else 0
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return 0
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            # Stage processes come and go between listing and reading
+            pass
+    return total
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = sorted(sample['latency'] for sample in samples)
+    errors = sum(1 for sample in samples if not sample['ok'])
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': errors / len(samples) if samples else 0.0,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': latencies[-1] * 1000 if latencies else 0.0
+        }
+    }
+
+
+def start_in_process_server() -> str:
+    """Run the FastAPI app with uvicorn in a background thread"""
+    import uvicorn
+    from app.main import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/health", timeout=1).status_code == 200:
+                return url
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError("In-process server did not start")
+
+
+class LoadTest:
+    def __init__(self, url: str, documents: list, mix: dict, unique: bool, params: dict):
+        self.url = url
+        self.documents = documents
+        self.mix = mix
+        self.unique = unique
+        self.params = params
+        self.output_files = []
+        self.samples = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def next_upload(self) -> tuple:
+        """Pick a document; in unique mode every page is stamped so server-side caches are bypassed"""
+        name, content = random.choice(self.documents)
+        if self.unique:
+            content = stamp_pdf(content, uuid.uuid4().hex)
+        return name, content
+
+    def convert(self, upload: tuple):
+        name, content = upload
+        response = self.session().post(
+            f"{self.url}/convert-pdf-to-xml",
+            files={"file": (name, content, "application/pdf")},
+            params=self.params
+        )
+        if response.status_code == 200:
+            with self.lock:
+                self.output_files.append(response.json()["xml_file"])
+        return response
+
+    def download(self):
+        return self.session().get(f"{self.url}/download/{random.choice(self.output_files)}")
+
+    def preview(self):
+        return self.session().get(f"{self.url}/preview/{random.choice(self.output_files)}",
+                                  params={"page": 1})
+
+    def run_one(self, scheduled: Optional[float] = None):
+        """Send one request; latency counts from `scheduled` (perf_counter) when given"""
+        endpoint = random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if endpoint != 'convert' and not self.output_files:
+            endpoint = 'convert'
+        # Build the upload before timing, so stamping is not counted as server latency
+        upload = self.next_upload() if endpoint == 'convert' else None
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = self.convert(upload) if upload else getattr(self, endpoint)()
+            ok = response.status_code == 200
+            status = response.status_code
+        except requests.RequestException as e:
+            ok, status = False, str(e)
+        sample = {
+            'endpoint': endpoint,
+            'start': start,
+            'latency': time.perf_counter() - start,
+            'ok': ok,
+            'status': status
+        }
+        with self.lock:
+            self.samples.append(sample)
+
+    def run_closed_loop(self, concurrency: int, deadline: float, max_requests: int):
+        """Keep `concurrency` requests in flight until the deadline"""
+        def worker():
+            while time.perf_counter() < deadline and (not max_requests or len(self.samples) < max_requests):
+                self.run_one()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open_loop(self, rate: float, concurrency: int, deadline: float, max_requests: int):
+        """Issue requests at a fixed rate regardless of how fast they complete
+        
+        Latency is measured from the scheduled send time, not from when a client
+        thread picks the request up, to avoid coordinated omission.
+        """
+        sent = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while time.perf_counter() < deadline and (not max_requests or sent < max_requests):
+                next_send = start + sent / rate
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.run_one, next_send)
+                sent += 1
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(','):
+        endpoint, weight = part.split('=')
+        if endpoint not in ('convert', 'download', 'preview'):
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {endpoint}")
+        mix[endpoint] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="target server; the app is started in-process when omitted")
+    parser.add_argument('--server-pid', type=int,
+                        help="PID of the target server; RSS is summed over it and its descendants")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, help="requests per second (open loop); closed loop when omitted")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds")
+    parser.add_argument('--requests', type=int, default=0, help="stop after this many requests (0 = no limit)")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('convert=0.5,download=0.25,preview=0.25'))
+    parser.add_argument('--pages', default='1,5,20', help="page counts of the generated PDFs")
+    parser.add_argument('--unique', action='store_true', help="make every upload unique to defeat caching")
+    parser.add_argument('--format', default='xml', help="output format requested from the converter")
+    parser.add_argument('--sample-interval', type=float, default=1.0, help="seconds between RSS samples")
+    parser.add_argument('--report', default='load_test_report.json')
+    args = parser.parse_args()
+
+    if args.url:
+        url = args.url.rstrip('/')
+        server_pid = args.server_pid
+        rss_scope = 'server process tree'
+    else:
+        url = start_in_process_server()
+        # The server shares this process, so its RSS includes the load generator
+        server_pid = os.getpid()
+        rss_scope = 'server+client process tree (in-process)'
+
+    documents = [(f"load_{pages}p.pdf", generate_pdf(int(pages))) for pages in args.pages.split(',')]
+    load_test = LoadTest(url, documents, args.mix, args.unique, {'format': args.format})
+
+    rss_samples = []
+    stop_sampling = threading.Event()
+    started = time.perf_counter()
+
+    def sample_rss():
+        while not stop_sampling.is_set():
+            if server_pid:
+                rss_samples.append({'t': round(time.perf_counter() - started, 3), 'rss_bytes': read_rss(server_pid)})
+            stop_sampling.wait(args.sample_interval)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    deadline = started + args.duration
+    if args.rate:
+        load_test.run_open_loop(args.rate, args.concurrency, deadline, args.requests)
+    else:
+        load_test.run_closed_loop(args.concurrency, deadline, args.requests)
+    elapsed = time.perf_counter() - started
+    stop_sampling.set()
+    sampler.join()
+
+    report = {
+        'config': {
+            'url': url,
+            'in_process': not args.url,
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'duration': args.duration,
+            'mix': args.mix,
+            'pages': args.pages,
+            'unique': args.unique,
+            'format': args.format
+        },
+        'elapsed_seconds': elapsed,
+        'overall': summarize(load_test.samples, elapsed),
+        'endpoints': {
+            endpoint: summarize([s for s in load_test.samples if s['endpoint'] == endpoint], elapsed)
+            for endpoint in sorted({s['endpoint'] for s in load_test.samples})
+        },
+        'errors_by_status': {},
+        'rss_scope': rss_scope,
+        'rss': rss_samples
+    }
+    for sample in load_test.samples:
+        if not sample['ok']:
+            status = str(sample['status'])
+            report['errors_by_status'][status] = report['errors_by_status'].get(status, 0) + 1
+
+    with open(args.report, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+
+    print(f"{'endpoint':<10}{'requests':>10}{'rps':>8}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in list(report['endpoints'].items()) + [('overall', report['overall'])]:
+        latency = stats['latency_ms']
+        print(f"{endpoint:<10}{stats['requests']:>10}{stats['throughput_rps']:>8.1f}"
+              f"{stats['error_rate'] * 100:>8.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}")
+    if rss_samples:
+        peak = max(sample['rss_bytes'] for sample in rss_samples)
+        print(f"{rss_scope} RSS peak: {peak / 1024 / 1024:.1f} MiB over {len(rss_samples)} samples")
+    print(f"report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark serialization and downstream parsing time for each output format.
+
+Run from the backend directory:
+    python -m benchmarks.bench_output_formats [--pages 200] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from xml.etree import ElementTree
+
+from app.output_formats import OutputSerializer
+
+
+def build_sample_data(pages: int) -> dict:
+    """Synthetic extraction result shaped like PDFProcessor.process_pdf output"""
+    text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40
+    return {
+        'metadata': {'title': 'Benchmark document', 'author': 'bench', 'producer': 'bench'},
+        'text_content': [
+            {'page': page, 'text': text, 'char_count': len(text), 'word_count': len(text.split())}
+            for page in range(1, pages + 1)
+        ],
+        'tables': [
+            {
+                'table_id': page,
+                'page': page,
+                'accuracy': 0.8,
+                'data': [{'A': f'a{row}', 'B': f'b{row}', 'C': str(row)} for row in range(20)],
+                'headers': ['A', 'B', 'C'],
+                'rows': 20,
+                'columns': 3
+            }
+            for page in range(1, pages + 1, 2)
+        ],
+        'images': [],
+        'page_count': pages
+    }
+
+
+def parse_back(content: bytes, fmt: str):
+    """Parse serialized output the way a downstream consumer would"""
+    if fmt == 'xml':
+        return ElementTree.fromstring(content)
+    if fmt == 'json':
+        return json.loads(content)
+    if fmt == 'ndjson':
+        return [json.loads(line) for line in content.splitlines() if line]
+    import msgpack
+    return msgpack.unpackb(content, raw=False)
+
+
+def time_best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    serializer = OutputSerializer()
+    data = build_sample_data(args.pages)
+
+    print(f"{'format':<10}{'bytes':>12}{'serialize ms':>15}{'parse ms':>12}")
+    for fmt in serializer.supported_formats():
+        content = serializer.serialize(data, fmt)
+        serialize_time = time_best(lambda: serializer.serialize(data, fmt), args.repeat)
+        parse_time = time_best(lambda: parse_back(content, fmt), args.repeat)
+        print(f"{fmt:<10}{len(content):>12}{serialize_time * 1000:>15.2f}{parse_time * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
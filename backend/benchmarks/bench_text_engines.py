@@ -0,0 +1,96 @@
+"""Benchmark throughput and output equivalence of the text extraction engines.
+
+Run from the backend directory:
+    python -m benchmarks.bench_text_engines [file.pdf ...] [--pages 50] [--repeat 3]
+
+Without input files a text-only PDF is generated with PyMuPDF.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from app.document_source import DocumentSource
+from app.pdf_processor import PDFProcessor
+
+
+def generate_sample_pdf(path: str, pages: int):
+    """Write a simple multi-page text PDF"""
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page()
+        lines = [f"Page {page_num} line {line}: the quick brown fox jumps over the lazy dog"
+                 for line in range(40)]
+        page.insert_text((72, 72), "\n".join(lines), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def compare_outputs(reference: list, candidate: list) -> dict:
+    """Compare two text_content lists page by page on normalized words"""
+    reference_pages = {entry['page']: entry for entry in reference}
+    candidate_pages = {entry['page']: entry for entry in candidate}
+    same_pages = set(reference_pages) == set(candidate_pages)
+    matching = 0
+    for page in set(reference_pages) & set(candidate_pages):
+        if reference_pages[page]['text'].split() == candidate_pages[page]['text'].split():
+            matching += 1
+    return {
+        'same_pages': same_pages,
+        'matching_pages': matching,
+        'total_pages': len(reference_pages),
+        'same_keys': all(set(entry) == set(reference[0]) for entry in candidate) if reference else True
+    }
+
+
+def benchmark_file(processor: PDFProcessor, pdf_path: str, repeat: int):
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    source = DocumentSource.from_path(pdf_path)
+    results = {}
+    for engine in PDFProcessor.TEXT_ENGINES:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = processor._extract_text(source, engine)
+            best = min(best, time.perf_counter() - start)
+        results[engine] = (best, output)
+
+    print(f"\n{os.path.basename(pdf_path)} ({page_count} pages)")
+    print(f"{'engine':<12}{'seconds':>10}{'pages/s':>12}")
+    for engine, (seconds, _) in results.items():
+        print(f"{engine:<12}{seconds:>10.3f}{page_count / seconds if seconds else 0:>12.1f}")
+
+    comparison = compare_outputs(results['pdfplumber'][1], results['pymupdf'][1])
+    print(f"equivalence: {comparison['matching_pages']}/{comparison['total_pages']} pages with identical words, "
+          f"same pages: {comparison['same_pages']}, same schema: {comparison['same_keys']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    processor = PDFProcessor()
+    files = list(args.files)
+    generated = None
+    if not files:
+        generated = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf').name
+        generate_sample_pdf(generated, args.pages)
+        files = [generated]
+
+    try:
+        for pdf_path in files:
+            benchmark_file(processor, pdf_path, args.repeat)
+    finally:
+        if generated:
+            os.unlink(generated)
+
+
+if __name__ == "__main__":
+    main()
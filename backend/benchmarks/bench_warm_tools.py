@@ -0,0 +1,141 @@
+"""Measure per-call overhead of OCR and page rasterization, cold versus warm.
+
+Run from the backend directory:
+    python -m benchmarks.bench_warm_tools [--conversions 5] [--images 8] [--pages 10]
+
+OCR: whole conversions through PDFProcessor.process_pdf with deadlines on,
+once with one `tesseract` process per image (the previous behaviour) and once
+with OCREngine (tesserocr API pool, or one batched tesseract run).
+Rasterization: one Ghostscript process per page (Camelot's default backend)
+versus PyMuPDFBackend rendering in-process.
+"""
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw
+
+from app.camelot_backend import PyMuPDFBackend
+from app.ocr_engine import OCREngine, TESSEROCR_AVAILABLE
+from app.pdf_processor import PDFProcessor
+
+CONVERSION_TIMEOUT = 300
+STAGE_TIMEOUT = 120
+
+
+class PerProcessOCREngine(OCREngine):
+    """One `tesseract` process per image, as before OCREngine existed"""
+
+    def image_to_string_batch(self, images, timeout=None):
+        texts = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index, image in enumerate(images):
+                image_path = os.path.join(temp_dir, f"{index}.png")
+                image.save(image_path)
+                texts.append(self._ocr_single_file(image_path))
+        return texts
+
+
+def make_images(count: int, label: str) -> list:
+    images = []
+    for index in range(count):
+        image = Image.new('L', (600, 120), 255)
+        ImageDraw.Draw(image).text((10, 40), f"Invoice {label} number {index:05d} total 1234.56", fill=0)
+        images.append(image)
+    return images
+
+
+def make_image_pdf(image_count: int, label: str) -> bytes:
+    """A one-page PDF with `image_count` text images; the label keeps pages out of the page cache"""
+    doc = fitz.open()
+    page = doc.new_page()
+    for index, image in enumerate(make_images(image_count, label)):
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        top = 36 + index * 90
+        page.insert_image(fitz.Rect(36, top, 486, top + 90), stream=buffer.getvalue())
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def make_single_page_pdfs(directory: str, count: int) -> list:
+    paths = []
+    for index in range(count):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {index}", fontsize=12)
+        for row in range(6):
+            page.draw_line((72, 100 + row * 20), (472, 100 + row * 20))
+        path = os.path.join(directory, f"page_{index}.pdf")
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def bench_ocr(conversions: int, image_count: int):
+    if not shutil.which('tesseract') and not TESSEROCR_AVAILABLE:
+        print("OCR: tesseract not installed, skipped")
+        return
+    tesseract_available = bool(shutil.which('tesseract'))
+    engines = []
+    if tesseract_available:
+        engines.append(('per-process', PerProcessOCREngine(tesseract_available)))
+    engines.append(('tesserocr pool' if TESSEROCR_AVAILABLE else 'batched run', OCREngine(tesseract_available)))
+
+    for name, engine in engines:
+        processor = PDFProcessor()
+        processor.ocr_engine = engine
+        timings = []
+        for run in range(conversions):
+            content = make_image_pdf(image_count, f"{name}-{run}")
+            start = time.perf_counter()
+            processor.process_pdf(content, timeout=CONVERSION_TIMEOUT, stage_timeout=STAGE_TIMEOUT)
+            timings.append(time.perf_counter() - start)
+        # The first conversion pays for loading the models; later ones show the steady state
+        steady = timings[1:] or timings
+        print(f"OCR {name:<14}: first {timings[0] * 1000:8.1f} ms, "
+              f"then {sum(steady) / len(steady) * 1000:8.1f} ms/conversion ({image_count} images)")
+
+def bench_rasterization(page_count: int):
+    gs = shutil.which('gs') or shutil.which('gswin64c')
+    backend = PyMuPDFBackend()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_paths = make_single_page_pdfs(temp_dir, page_count)
+
+        if gs:
+            start = time.perf_counter()
+            for pdf_path in pdf_paths:
+                subprocess.run([gs, '-q', '-sDEVICE=png16m', '-o', pdf_path + '.gs.png', '-r300', pdf_path],
+                               capture_output=True, check=True)
+            cold = time.perf_counter() - start
+            print(f"Raster ghostscript: {cold / page_count * 1000:8.1f} ms/page")
+        else:
+            print("Raster ghostscript: gs not installed, skipped")
+
+        start = time.perf_counter()
+        for pdf_path in pdf_paths:
+            backend.convert(pdf_path, pdf_path + '.mupdf.png', resolution=300)
+        warm = time.perf_counter() - start
+        print(f"Raster PyMuPDF    : {warm / page_count * 1000:8.1f} ms/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--conversions', type=int, default=5)
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--pages', type=int, default=10)
+    args = parser.parse_args()
+
+    bench_ocr(args.conversions, args.images)
+    bench_rasterization(args.pages)
+
+
+if __name__ == "__main__":
+    main()
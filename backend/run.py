@@ -1,10 +1,49 @@
+import argparse
+import os
 import uvicorn
-from app.main import app
+
+
+def run_workers(host: str, port: int, workers: int):
+    """Serve with N worker processes forked from a preloaded master
+
+    Gunicorn imports the app once before forking, so workers share the
+    memory of the already imported PDF libraries. Results are shared
+    between workers through the on-disk result index.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', 'uvicorn.workers.UvicornWorker')
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    PreloadedApplication().run()
+
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the PDF to XML converter API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "0")),
+        help="number of worker processes for production serving (0 = single process with auto-reload)"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 0:
+        run_workers(args.host, args.port, args.workers)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True
+        )
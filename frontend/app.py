@@ -1,29 +1,113 @@
 import streamlit as st
 import requests
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 API_URL = "http://localhost:8000"
+PREVIEW_PAGE_SIZE = 200  # lines per preview page
+POLL_INTERVAL = 0.5  # seconds between progress updates
+
+
+@st.cache_resource
+def get_executor():
+    """Background threads for conversions, shared across reruns and sessions"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def convert_pdf(filename, content):
+    """POST the PDF to the backend; runs in a background thread"""
+    files = {"file": (filename, content, "application/pdf")}
+    response = requests.post(f"{API_URL}/convert-pdf-to-xml", files=files)
+    if response.status_code == 200:
+        return {"ok": True, "data": response.json()}
+    try:
+        detail = response.json().get("detail", "Conversion failed.")
+    except ValueError:
+        detail = "Conversion failed."
+    return {"ok": False, "detail": detail}
+
+
+@st.cache_data(show_spinner=False)
+def fetch_preview(file_hash, xml_file, page):
+    """Fetch one page of the preview; keyed on the PDF hash so new uploads are not served stale
+
+    Raises on failure so that errors are not cached and the next rerun retries.
+    """
+    response = requests.get(
+        f"{API_URL}/preview/{xml_file}",
+        params={"page": page, "page_size": PREVIEW_PAGE_SIZE}
+    )
+    response.raise_for_status()
+    return response.json()
+
 
 st.title("PDF to XML Converter")
 
+# Successful conversions, in-flight requests and the last error of failed ones,
+# keyed by the SHA-256 of the PDF; only successes are kept for good
+if "conversions" not in st.session_state:
+    st.session_state.conversions = {}
+if "pending" not in st.session_state:
+    st.session_state.pending = {}
+if "failures" not in st.session_state:
+    st.session_state.failures = {}
+
 uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
 
 if uploaded_file:
-    with st.spinner("Uploading and converting PDF..."):
-        files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
-        response = requests.post(f"{API_URL}/convert-pdf-to-xml", files=files)
-        if response.status_code == 200:
-            data = response.json()
-            st.success(data["message"])
-            xml_file = data["xml_file"]
-            download_url = f"{API_URL}/download/{xml_file}"
-            preview_url = f"{API_URL}/preview/{xml_file}"
-            st.markdown(f"[Download XML]({download_url})")
-            if st.button("Preview XML"):
-                preview_response = requests.get(preview_url)
-                if preview_response.status_code == 200:
-                    xml_content = preview_response.json()["xml_content"]
-                    st.code(xml_content, language="xml")
-                else:
-                    st.error("Could not preview XML file.")
+    content = uploaded_file.getvalue()
+    file_hash = hashlib.sha256(content).hexdigest()
+
+    # Start a conversion unless this file is converted, converting, or awaiting a retry
+    if (file_hash not in st.session_state.conversions and file_hash not in st.session_state.pending
+            and file_hash not in st.session_state.failures):
+        future = get_executor().submit(convert_pdf, uploaded_file.name, content)
+        st.session_state.pending[file_hash] = (future, time.time())
+
+    if file_hash in st.session_state.pending:
+        future, started = st.session_state.pending[file_hash]
+        progress = st.progress(0, text="Uploading and converting PDF...")
+        while not future.done():
+            elapsed = time.time() - started
+            # The backend does not report progress, so approach 95% asymptotically
+            progress.progress(min(95, int(95 * (1 - 1 / (1 + elapsed / 10)))),
+                              text=f"Converting PDF... {elapsed:.0f}s elapsed")
+            time.sleep(POLL_INTERVAL)
+        progress.empty()
+        try:
+            result = future.result()
+        except requests.RequestException as e:
+            result = {"ok": False, "detail": f"Backend unreachable: {e}"}
+        if result["ok"]:
+            st.session_state.conversions[file_hash] = result
         else:
-            st.error(response.json().get("detail", "Conversion failed."))
+            st.session_state.failures[file_hash] = result["detail"]
+        del st.session_state.pending[file_hash]
+
+    if file_hash in st.session_state.failures:
+        st.error(st.session_state.failures[file_hash])
+        if st.button("Retry conversion", key=f"retry_{file_hash}"):
+            del st.session_state.failures[file_hash]
+            st.rerun()
+    else:
+        data = st.session_state.conversions[file_hash]["data"]
+        st.success(data["message"])
+        xml_file = data["xml_file"]
+        download_url = f"{API_URL}/download/{xml_file}"
+        st.markdown(f"[Download XML]({download_url})")
+
+        if st.toggle("Preview XML", key=f"preview_{file_hash}"):
+            try:
+                first_page = fetch_preview(file_hash, xml_file, 1)
+                page = st.number_input(
+                    f"Preview page (of {first_page['total_pages']})",
+                    min_value=1,
+                    max_value=first_page["total_pages"],
+                    value=1,
+                    key=f"preview_page_{file_hash}"
+                )
+                preview = first_page if page == 1 else fetch_preview(file_hash, xml_file, page)
+                st.code(preview["xml_content"], language="xml")
+            except (requests.RequestException, ValueError):
+                st.error("Could not preview XML file.")